@@ -0,0 +1,152 @@
+# Aggregates the exoplanet catalogs by the class of their parent star. Star
+# types like 'K7V' are reduced to their class letter through the distinct
+# types rather than row by row, and the number of planets and habitable
+# planets of each class are counted together in one pass over the rows.
+# Catalogs too big to fit in memory can be aggregated a chunk at a time,
+# with the counts and summaries of each chunk merged into running totals,
+# so memory doesn't grow with the number of rows. The counts come out the
+# same as aggregating the whole catalog at once, and the quantiles to within
+# sketch.RELATIVE_ERROR.
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import catalog
+import matrix
+import sketch
+
+# the columns a catalog's planets are grouped by when streamed, the star
+# class is worked out from the star's type
+GROUPS = ['P. Habitable Class', 'S. Class']
+
+
+def star_classes(types):
+    """
+    Return the class letter of each of the given star types, the first letter
+    of the type, as a categorical with missing types left missing. Only the
+    distinct types are looked at, so this is quick for any number of rows.
+    """
+    types = pd.Series(types).astype('category')
+    letters = pd.Series(types.cat.categories.astype(str).str[0])
+    classes, index = pd.factorize(letters, sort=True)
+    codes = types.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, classes[np.maximum(codes, 0)], -1)
+    return pd.Categorical.from_codes(codes, index)
+
+
+def star_class_counts(data):
+    """
+    Return a table with a row for each star class in the data, sorted by
+    class, giving the number of planets around stars of that class that are
+    habitable and the total number of planets. Planets with no star type are
+    left out.
+    """
+    classes = star_classes(data['S. Type'])
+    codes = classes.codes
+    known = codes >= 0
+    size = len(classes.categories)
+    habitable = data['P. Habitable'].fillna(0).to_numpy()[known]
+    return pd.DataFrame({
+        'Type': classes.categories,
+        'habitable': np.bincount(codes[known], weights=habitable,
+                                 minlength=size).astype(int),
+        'total': np.bincount(codes[known], minlength=size)
+    })
+
+
+def summarize(groups, data, columns, summaries):
+    """
+    Add the values of the given columns of data to summaries, a dict from
+    each group to a dict from each column to its sketch.Summary, grouping
+    the rows by the given labels. Rows with a missing label are left out.
+    """
+    labels = pd.Series(groups)
+    for group, rows in labels.groupby(labels, observed=True).indices.items():
+        group = summaries.setdefault(str(group), dict())
+        for name in columns:
+            group.setdefault(name, sketch.Summary()).update(
+                data[name].to_numpy()[rows])
+
+
+def stream(path, columns=matrix.FEATURES, size=100000):
+    """
+    Aggregate the catalog csv at the given path a chunk of the given number
+    of rows at a time. Returns the table star_class_counts gives for the
+    whole catalog, and a dict from each column in GROUPS to the summaries of
+    the given columns for each of its groups, as in summarize.
+    """
+    counts = None
+    summaries = {name: dict() for name in GROUPS}
+    read = list(dict.fromkeys(['S. Type', 'P. Habitable',
+                               'P. Habitable Class'] + list(columns)))
+    for chunk in catalog.read_chunks(path, read, size):
+        part = star_class_counts(chunk).set_index('Type')
+        counts = part if counts is None else \
+            counts.add(part, fill_value=0).astype(int)
+        summarize(chunk['P. Habitable Class'], chunk, columns,
+                  summaries['P. Habitable Class'])
+        summarize(star_classes(chunk['S. Type']), chunk, columns,
+                  summaries['S. Class'])
+    return counts.reset_index(), summaries
+
+
+def check(path, counts, summaries, columns=matrix.FEATURES):
+    """
+    Compare the results of stream with aggregating the whole catalog at
+    once, printing the largest relative error of any median or 90th
+    percentile. Raises an AssertionError if any count differs.
+    """
+    data = catalog.read_csv(path)
+    expected = star_class_counts(data)
+    assert counts.equals(expected), 'star class counts differ'
+    labels = {'P. Habitable Class': data['P. Habitable Class'],
+              'S. Class': pd.Series(star_classes(data['S. Type']))}
+    worst = 0
+    for by, groups in summaries.items():
+        for group, rows in data.groupby(labels[by].to_numpy(),
+                                        observed=True):
+            for name in columns:
+                values = rows[name].dropna().to_numpy(dtype=np.float64)
+                summary = groups[str(group)][name]
+                assert summary.count == len(values), \
+                    'count of %s for %s differs' % (name, group)
+                for q in [.5, .9]:
+                    exact = np.quantile(values, q, method='lower') \
+                        if len(values) else np.nan
+                    if exact:
+                        error = abs(summary.quantile(q) - exact) / abs(exact)
+                        worst = max(worst, error)
+    print('counts match, largest quantile error %.6f%% (bound %.6f%%)' %
+          (100 * worst, 100 * sketch.RELATIVE_ERROR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate a catalog a '
+                                     'chunk at a time')
+    parser.add_argument('catalog', nargs='?',
+                        default='phl_hec_all_confirmed.csv')
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                        help='rows to read at a time')
+    parser.add_argument('--check', action='store_true',
+                        help='compare with aggregating the whole catalog')
+    args = parser.parse_args()
+
+    counts, summaries = stream(args.catalog, size=args.chunk_size)
+    print(counts.to_string(index=False))
+    for by, groups in summaries.items():
+        print()
+        print(by)
+        for group, columns in sorted(groups.items()):
+            for name, summary in columns.items():
+                print('  %-18s %-26s %8d  mean %10.4g  median %10.4g  '
+                      'p90 %10.4g' % (group, name, summary.count,
+                                      summary.mean, summary.quantile(.5),
+                                      summary.quantile(.9)))
+    if args.check:
+        print()
+        check(args.catalog, counts, summaries)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+# Times each stage of the pipeline on synthetic catalogs of different sizes.
+# The synthetic catalogs are made by resampling the rows of each habitable
+# class of the confirmed exoplanet catalog in proportion to how common it is,
+# so the class imbalance is kept, and jittering the measurements slightly so
+# the values aren't just repeats of the real ones, without taking any
+# outside the range of the real values. Loading, every plot, the
+# star type aggregation and fitting and scoring the habitability model are
+# each timed on their own, along with how long the main modules take to
+# import in a fresh interpreter, and the results are saved as json named
+# after the current commit so they can be compared from one commit to the
+# next.
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+import aggregate
+import catalog
+import clip
+import dataset
+import matrix
+import metrics
+import plots
+import stars
+import stats_functions
+
+RESULTS = 'benchmarks'
+
+# the modules whose import time is measured, the command line first since
+# every subcommand pays for it
+IMPORTS = ['exoplanets', 'catalog', 'matrix', 'plots', 'models',
+           'stats_functions']
+
+
+def synthetic(data, rows, seed=0):
+    """
+    Return a synthetic catalog with the given number of rows drawn from the
+    given catalog, with each habitable class making up the same share of the
+    rows as it does in the given catalog. Measurements that are always
+    positive are jittered by a hundredth in log space, so they stay
+    positive, and the rest by a hundredth of their spread, held to the
+    range of the real values.
+    """
+    rng = np.random.default_rng(seed)
+    classes = data['P. Habitable Class']
+    shares = classes.value_counts(normalize=True)
+    counts = np.round(shares * rows).astype(int)
+    counts.iloc[0] += rows - counts.sum()
+    picked = np.concatenate([
+        rng.choice(np.flatnonzero((classes == c).to_numpy()), n)
+        for c, n in counts.items()])
+    fake = data.iloc[rng.permutation(picked)].reset_index(drop=True)
+
+    for name in fake.columns:
+        if fake[name].dtype.kind != 'f' or name == 'P. Name KOI':
+            continue
+        known = data[name].dropna().to_numpy(dtype=np.float64)
+        if not len(known):
+            continue
+        values = fake[name].to_numpy(dtype=np.float64)
+        if known.min() > 0:
+            jittered = values * np.exp(rng.normal(0, .01, len(fake)))
+        else:
+            jittered = values + rng.normal(0, np.std(known) / 100, len(fake))
+        jittered = np.clip(jittered, known.min(), known.max())
+        fake[name] = jittered.astype(fake[name].dtype)
+    return fake
+
+
+def timings(func, repeat):
+    """
+    Call func the given number of times, returning how many seconds each
+    call took.
+    """
+    seconds = list()
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start_time)
+    return seconds
+
+
+def peak_memory(func):
+    """
+    Call func once, returning the most memory in bytes it had allocated at
+    any one time.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(func, repeat, rows=None):
+    """
+    Return the median and 95th percentile time of func over the given number
+    of calls, and its peak memory from one more call. If func handles a
+    given number of rows, the median rows handled per second is included.
+    """
+    seconds = timings(func, repeat)
+    results = {'median': float(np.median(seconds)),
+               'p95': float(np.percentile(seconds, 95)),
+               'peak_mb': peak_memory(func) / 2 ** 20,
+               'runs': len(seconds)}
+    if rows is not None:
+        results['rows_per_second'] = rows / results['median']
+    return results
+
+
+def run(rows, repeat, source='phl_hec_all_confirmed.csv'):
+    """
+    Benchmark every stage on a synthetic catalog of the given number of rows,
+    returning a dict from the name of each stage to its measurements. The
+    catalog, its cache and the plots are all written to a temporary
+    directory.
+    """
+    data = synthetic(catalog.read_csv(source), rows)
+    results = dict()
+    here = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            path = 'synthetic.csv'
+            data.to_csv(path, index=False)
+
+            def cold():
+                shutil.rmtree(catalog.CACHE, ignore_errors=True)
+                catalog.load(path)
+
+            results['load cold'] = measure(cold, repeat)
+            results['load warm'] = measure(lambda: catalog.load(path),
+                                           repeat)
+
+            ds = dataset.Dataset(catalog.load(path))
+            frames = {'data': ds.data, 'h': ds.h, 'nh': ds.nh}
+            results['s_type aggregation'] = measure(
+                lambda: aggregate.star_class_counts(ds.data), repeat)
+            for plot, names, _, label, _, _ in stats_functions.PLOTS:
+                args = [frames[n] for n in names]
+                # up to when its files have been written in the background
+                results['plot ' + label] = measure(
+                    lambda: (plot(*args), plots.flush()), repeat)
+
+            results['feature matrix'] = measure(
+                lambda: matrix.build(ds.data), repeat)
+            results['habitability metrics'] = measure(
+                lambda: metrics.compute(ds.data), repeat, rows)
+            features = matrix.build(ds.data)
+            X = features.X
+            y = features.targets['P. Habitable']
+            X_train, X_test, y_train, y_test = \
+                train_test_split(X, y, test_size=.2, random_state=0)
+            model = DecisionTreeClassifier(random_state=0)
+            results['model fit'] = measure(
+                lambda: model.fit(X_train, y_train), repeat)
+            results['model predict'] = measure(
+                lambda: model.predict(X_test), repeat, len(X_test))
+
+            # both targets with a tree each against a single tree predicting
+            # both, trained and tested on the same split
+            train, test = train_test_split(np.arange(len(features)),
+                                           test_size=.2, random_state=0)
+            trees = {target: DecisionTreeClassifier(random_state=0)
+                     for target in matrix.TARGETS}
+
+            def fit_each():
+                for target, tree in trees.items():
+                    tree.fit(X[train], features.targets[target][train])
+
+            results['two models fit'] = measure(fit_each, repeat)
+            results['two models predict'] = measure(
+                lambda: [tree.predict(X[test]) for tree in trees.values()],
+                repeat, len(test))
+            Y, _ = features.codes()
+            multi = DecisionTreeClassifier(random_state=0)
+            results['multi-output fit'] = measure(
+                lambda: multi.fit(X[train], Y[train]), repeat)
+            results['multi-output predict'] = measure(
+                lambda: multi.predict(X[test]), repeat, len(test))
+        finally:
+            os.chdir(here)
+    return results
+
+
+def import_time(module):
+    """
+    Return how many seconds importing the given module takes in a fresh
+    interpreter, along with everything it imports, as reported by python's
+    -X importtime.
+    """
+    report = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import ' + module], capture_output=True,
+                            text=True, check=True).stderr
+    for line in reversed(report.splitlines()):
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1e6
+    raise ValueError('no import time reported for %s' % module)
+
+
+def import_times(repeat, modules=IMPORTS):
+    """
+    Return a dict from each of the given modules to the median and 95th
+    percentile of how long it took to import over the given number of fresh
+    interpreters.
+    """
+    results = dict()
+    for module in modules:
+        seconds = [import_time(module) for _ in range(repeat)]
+        results[module] = {'median': float(np.median(seconds)),
+                           'p95': float(np.percentile(seconds, 95)),
+                           'runs': len(seconds)}
+    return results
+
+
+def star_tables(repeat):
+    """
+    Print how much memory the star attributes of each real catalog take up
+    repeated on every planet compared to as a star table, and how long
+    working out their outlier bounds takes each way.
+    """
+    for path in ['phl_hec_all_confirmed.csv', 'phl_hec_all_kepler.csv']:
+        data = catalog.read_csv(path)
+        table = stars.build(data)
+        print(path)
+        print('  %d planets around %d stars, %d stars whose planets '
+              'disagree' % (len(data), len(table.stars),
+                            stars.conflicts(data, table)))
+        per_planet = data[table.stars.columns].memory_usage(deep=True).sum()
+        per_star = table.stars.memory_usage(deep=True).sum() + \
+            table.index.nbytes
+        print('  star columns    %8.3f MB per planet  %8.3f MB per star '
+              '(%.1f%%)' % (per_planet / 2 ** 20, per_star / 2 ** 20,
+                            100 * per_star / per_planet))
+        numeric = clip.star_columns(table.stars)
+        planet = measure(lambda: clip.bounds(data, numeric), repeat)
+        star = measure(lambda: clip.bounds(table.stars, numeric), repeat)
+        print('  outlier bounds  %8.3f ms per planet  %8.3f ms per star '
+              '(%.1f%%)' % (1000 * planet['median'], 1000 * star['median'],
+                            100 * star['median'] / planet['median']))
+
+
+def commit():
+    """
+    Return the short hash of the current git commit, or 'unknown' outside of
+    a git repository.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old, new):
+    """
+    Print how the median time of each stage and import changed between two
+    sets of results.
+    """
+    for module, now in new['imports'].items():
+        before = old.get('imports', dict()).get(module)
+        if before is not None:
+            print('import %-28s %8.4fs -> %8.4fs  (%.2fx)' %
+                  (module, before['median'], now['median'],
+                   now['median'] / before['median']))
+    for rows, stages in new['sizes'].items():
+        for stage, now in stages.items():
+            before = old['sizes'].get(rows, dict()).get(stage)
+            if before is not None:
+                print('%8s rows  %-24s %8.4fs -> %8.4fs  (%.2fx)' %
+                      (rows, stage, before['median'], now['median'],
+                       now['median'] / before['median']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline on '
+                                     'synthetic catalogs')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10000, 100000, 1000000],
+                        help='numbers of rows to benchmark')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='times to run each stage')
+    parser.add_argument('--compare', help='earlier results to compare with')
+    parser.add_argument('--star-tables', action='store_true',
+                        help='report what the star tables of the real '
+                        'catalogs save and stop')
+    parser.add_argument('--imports', action='store_true',
+                        help='only measure how long the modules take to '
+                        'import')
+    args = parser.parse_args()
+    if args.star_tables:
+        star_tables(args.repeat)
+        return
+
+    results = {'commit': commit(), 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+               'repeat': args.repeat, 'sizes': dict(),
+               'imports': import_times(args.repeat)}
+    for module, m in results['imports'].items():
+        print('import %-28s median %8.4fs  p95 %8.4fs' %
+              (module, m['median'], m['p95']))
+    if args.imports:
+        args.sizes = []
+    for rows in args.sizes:
+        results['sizes'][str(rows)] = run(rows, args.repeat)
+        for stage, m in results['sizes'][str(rows)].items():
+            line = '%8d rows  %-24s median %8.4fs  p95 %8.4fs  peak %8.1f MB' \
+                % (rows, stage, m['median'], m['p95'], m['peak_mb'])
+            if 'rows_per_second' in m:
+                line += '  %10.0f rows/s' % m['rows_per_second']
+            print(line)
+
+    os.makedirs(RESULTS, exist_ok=True)
+    path = os.path.join(RESULTS, results['commit'] + '.json')
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('saved results to', path)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
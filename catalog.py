@@ -0,0 +1,227 @@
+# Reads in the PHL exoplanet catalogs. The first time a catalog is read it is
+# parsed from csv and saved as one NumPy file per column in a cache directory
+# named after a hash of the csv's contents, so later runs only load the
+# columns they need straight from disk rather than parsing the whole csv
+# again. Changing the csv changes its hash, which makes a new cache.
+# Columns are parsed with the types declared in SCHEMA rather than whatever
+# pandas guesses, with the '-' and blank placeholders for missing values
+# read in as NaN.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import instrument
+
+CACHE = '.catalog_cache'
+
+# values the catalogs use in place of a missing value, on top of blank ones
+NA_VALUES = ['-']
+
+# columns that hold one of a handful of labels
+CATEGORIES = ['P. Zone Class', 'P. Mass Class', 'P. Composition Class',
+              'P. Atmosphere Class', 'P. Habitable Class', 'S. Constellation',
+              'S. Type', 'P. Disc. Method']
+
+# columns that name a planet or star
+NAMES = ['P. Name', 'P. Name Kepler', 'S. Name', 'S. Name HD', 'S. Name HIP']
+
+# columns holding counts or 0/1 flags, which are never missing
+COUNTS = ['S. No. Planets', 'S. No. Planets HZ', 'S. HabCat', 'P. Habitable',
+          'P. Hab Moon', 'P. Confirmed']
+
+# the type each column is parsed as, every column not listed is a measurement
+# read in as a float32
+SCHEMA = dict()
+SCHEMA.update({name: 'category' for name in CATEGORIES})
+SCHEMA.update({name: 'str' for name in NAMES})
+SCHEMA.update({name: 'int8' for name in COUNTS})
+SCHEMA['P. Name KOI'] = 'float64'
+
+
+def file_hash(path):
+    """
+    Return a hash of the contents of the file at the given path.
+    """
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def cache_dir(path):
+    """
+    Return the directory the cache for the csv at the given path is kept in,
+    which depends on both the contents of the csv and the schema it is read
+    in with.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.sha1((file_hash(path) +
+                        json.dumps(SCHEMA, sort_keys=True)).encode())
+    return os.path.join(os.path.dirname(path), CACHE,
+                        stem + '-' + key.hexdigest()[:16])
+
+
+@contextmanager
+def atomic_write(target, mode='wb'):
+    """
+    Open a temporary file next to the given target in the given mode for
+    the code inside this context to write to, then move it into place over
+    the target, so a half written file is never left under the target's
+    name. The temporary file is removed if the code raises.
+    """
+    fd, building = tempfile.mkstemp(dir=os.path.dirname(target))
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(building, target)
+    except BaseException:
+        if os.path.exists(building):
+            os.remove(building)
+        raise
+
+
+def dtypes(path):
+    """
+    Return the type each column of the csv at the given path is parsed as.
+    """
+    columns = pd.read_csv(path, nrows=0).columns
+    return {name: SCHEMA.get(name, 'float32') for name in columns}
+
+
+def read_csv(path, typed=True):
+    """
+    Parse the catalog csv at the given path into a DataFrame, with the types
+    given by SCHEMA and missing values as NaN. If typed is False the csv is
+    read in with the types pandas guesses instead.
+    """
+    if not typed:
+        return pd.read_csv(path)
+    return pd.read_csv(path, dtype=dtypes(path), na_values=NA_VALUES,
+                       skipinitialspace=True)
+
+
+def read_chunks(path, columns=None, size=100000):
+    """
+    Yield the given columns, or all of them if none are given, of the
+    catalog csv at the given path as DataFrames of at most the given number
+    of rows, parsed as in read_csv, so a catalog can be worked through
+    without holding all of it in memory.
+    """
+    types = dtypes(path)
+    if columns is None:
+        columns = list(types)
+    return pd.read_csv(path, usecols=columns, chunksize=size,
+                       dtype={name: types[name] for name in columns},
+                       na_values=NA_VALUES, skipinitialspace=True)
+
+
+def memory_report(path):
+    """
+    Print how much memory the csv at the given path takes up when read in
+    with the types pandas guesses compared to the types in SCHEMA.
+    """
+    default = read_csv(path, typed=False).memory_usage(deep=True).sum()
+    typed = read_csv(path).memory_usage(deep=True).sum()
+    print(path)
+    print('  default types: %.2f MB' % (default / 2 ** 20))
+    print('  schema types:  %.2f MB (%.1f%% of default)' %
+          (typed / 2 ** 20, 100 * typed / default))
+
+
+def build_cache(path):
+    """
+    Parse the csv at the given path and save each of its columns to the
+    cache, replacing any cache made from an older version of the file.
+    Numeric columns are saved as they are, and every other column is saved as
+    integer codes into a list of its distinct values. Returns the directory
+    the cache was saved to.
+    """
+    target = cache_dir(path)
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    with instrument.span('parse', file=os.path.basename(path)):
+        data = read_csv(path)
+
+    # write to a temporary directory first so a half written cache is never
+    # picked up by another run
+    building = tempfile.mkdtemp(dir=parent)
+    columns = list()
+    for i, name in enumerate(data.columns):
+        column = data[name]
+        entry = {'name': name, 'file': 'col_%03d.npy' % i}
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            values = column.cat.codes.to_numpy()
+            entry['categories'] = [str(c) for c in column.cat.categories]
+        elif pd.api.types.is_numeric_dtype(column.dtype):
+            values = column.to_numpy()
+        else:
+            codes, categories = pd.factorize(column)
+            values = codes.astype(np.int32)
+            entry['categories'] = [str(c) for c in categories]
+        np.save(os.path.join(building, entry['file']), values)
+        columns.append(entry)
+    with open(os.path.join(building, 'columns.json'), 'w') as f:
+        json.dump(columns, f)
+
+    try:
+        os.replace(building, target)
+    except OSError:
+        # another run saved the same cache first, so use theirs
+        if not os.path.isdir(target):
+            raise
+        shutil.rmtree(building, ignore_errors=True)
+
+    # remove caches of older versions of this csv, leaving this version's
+    # and everything other runs have saved in it alone
+    name = os.path.basename(target)
+    stem = name.rsplit('-', 1)[0]
+    for old in os.listdir(parent):
+        if old != name and old.rsplit('-', 1)[0] == stem:
+            shutil.rmtree(os.path.join(parent, old), ignore_errors=True)
+    return target
+
+
+def load(path, columns=None):
+    """
+    Return the catalog csv at the given path as a DataFrame, reading only the
+    given columns, or all of them if none are given. Columns are read from
+    the cache, which is built first if the csv has changed since it was last
+    made. Non-numeric columns are returned as categoricals.
+    """
+    with instrument.span('load', file=os.path.basename(path)):
+        target = cache_dir(path)
+        manifest = os.path.join(target, 'columns.json')
+        if not os.path.exists(manifest):
+            target = build_cache(path)
+        with open(manifest) as f:
+            entries = {entry['name']: entry for entry in json.load(f)}
+        if columns is None:
+            columns = list(entries)
+
+        data = dict()
+        for name in columns:
+            if name not in entries:
+                raise KeyError('%s has no column %r' % (path, name))
+            entry = entries[name]
+            values = np.load(os.path.join(target, entry['file']),
+                             mmap_mode='r')
+            if 'categories' in entry:
+                values = pd.Categorical.from_codes(values, entry['categories'])
+            data[name] = values
+        return pd.DataFrame(data, columns=columns)
+
+
+def main():
+    memory_report('phl_hec_all_confirmed.csv')
+    memory_report('phl_hec_all_kepler.csv')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Works out which values of each star attribute are outliers, so plots can
+# leave them out without a window being picked by hand for every column.
+# The bounds for every numeric star column are worked out together from a
+# single array of the catalog's star columns: values with a modified z-score,
+# their distance from the median in units of the scaled median absolute
+# deviation, above THRESHOLD are outliers. Columns with no negative values,
+# which are mostly skewed with a long tail of big values, are scored in log
+# space, and columns the median absolute deviation doesn't suit are bounded
+# by quantiles instead. Bounds never reach past the values there are. The
+# bounds of attributes of the star alone come from the catalog's star table,
+# so a star with several planets counts once rather than once for each
+# planet.
+# The bounds are saved in the catalog's cache, so they are worked out again
+# only when the csv changes.
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import catalog
+import stars
+
+# the modified z-score past which a value is an outlier, as suggested by
+# Iglewicz and Hoaglin
+THRESHOLD = 3.5
+
+# scales the median absolute deviation to the standard deviation for
+# normally distributed values
+MAD_SCALE = 1.4826
+
+# the quantiles kept for columns bounded by quantile
+QUANTILES = (.01, .99)
+
+# columns bounded by quantile, the positions of stars cluster where the
+# telescopes looked, so their spread says nothing about outliers
+BY_QUANTILE = ['S. RA (hrs)', 'S. DEC (deg)']
+
+
+def star_columns(data):
+    """
+    Return the names of the numeric star columns of the given frame.
+    """
+    return [name for name in data.columns
+            if name.startswith('S. ') and data[name].dtype.kind in 'fi']
+
+
+def bounds(data, columns=None):
+    """
+    Return a dict from each of the given columns, or every numeric star
+    column if none are given, to the lowest and highest values of it that
+    aren't outliers.
+    """
+    if columns is None:
+        columns = star_columns(data)
+    X = data[columns].to_numpy(dtype=np.float64)
+    # a zero in a column scored in log space is infinitely far below the rest
+    logged = ~np.any(X < 0, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Y = np.where(logged, np.log(X), X)
+        median = np.nanmedian(Y, axis=0)
+        spread = MAD_SCALE * np.nanmedian(np.abs(Y - median), axis=0)
+        low, high = median - THRESHOLD * spread, median + THRESHOLD * spread
+    low = np.where(logged, np.exp(low), low)
+    high = np.where(logged, np.exp(high), high)
+    # fall back to the quantiles where at least half the values are the same
+    by_mad = np.isfinite(median) & np.isfinite(spread) & (spread > 0) & \
+        ~np.isin(columns, BY_QUANTILE)
+    quantiles = np.nanquantile(X, QUANTILES, axis=0)
+    low = np.maximum(np.where(by_mad, low, quantiles[0]),
+                     np.nanmin(X, axis=0))
+    high = np.minimum(np.where(by_mad, high, quantiles[1]),
+                      np.nanmax(X, axis=0))
+    return {name: (float(lo), float(hi))
+            for name, lo, hi in zip(columns, low, high)}
+
+
+def masks(data, limits):
+    """
+    Return a dict from each column in the given bounds to a boolean array
+    saying which rows of data fall within them. Missing values fall outside.
+    """
+    return {name: ((data[name] >= low) & (data[name] <= high)).to_numpy()
+            for name, (low, high) in limits.items() if name in data.columns}
+
+
+def path(csv):
+    """
+    Return the file the bounds of the catalog csv at the given path are
+    cached in, which changes with the csv and the way bounds are worked out.
+    """
+    key = hashlib.sha1(json.dumps([THRESHOLD, MAD_SCALE, QUANTILES,
+                                   BY_QUANTILE, 'stars', 'log']).encode())
+    return os.path.join(catalog.cache_dir(csv),
+                        'bounds-%s.json' % key.hexdigest()[:16])
+
+
+def load(csv):
+    """
+    Return the bounds of every numeric star column of the catalog csv at the
+    given path, as in bounds, loading them from the cache when they have
+    already been worked out.
+    """
+    target = path(csv)
+    if os.path.exists(target):
+        with open(target) as f:
+            return {name: tuple(b) for name, b in json.load(f).items()}
+    limits = bounds(stars.load(csv).stars)
+    data = catalog.load(csv, stars.SEEN_FROM_PLANET)
+    limits.update(bounds(data))
+    with catalog.atomic_write(target, 'w') as f:
+        json.dump(limits, f, indent=1)
+    return limits
@@ -0,0 +1,149 @@
+# Links each Kepler object to the confirmed exoplanet it turned out to be, if
+# any. The two catalogs name planets in different ways, the confirmed
+# catalog by their published name and the Kepler catalog by their KOI
+# number, with either sometimes giving the other's name too, so each
+# identifier column is normalized, folding case, spaces and dashes, and the
+# confirmed planets are indexed by each one in a hash table. Every Kepler
+# object is then looked up in each index in turn with a single vectorized
+# lookup per identifier. The matched row pairs are cached alongside the
+# Kepler catalog's cache, so the join is only done again when either
+# catalog changes.
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import catalog
+
+CONFIRMED = 'phl_hec_all_confirmed.csv'
+KEPLER = 'phl_hec_all_kepler.csv'
+
+# the identifiers planets are matched by, most reliable first
+IDENTIFIERS = ['P. Name KOI', 'P. Name Kepler', 'P. Name']
+
+# the labels compared between the matched planets
+LABELS = ['P. Habitable', 'P. Habitable Class']
+
+
+def normalize(names):
+    """
+    Return the given planet names with case, spaces, dashes and underscores
+    folded away, so 'Kepler-22 b' and 'kepler 22b' are the same, as an array
+    with missing names as None. KOI numbers are written out as names.
+    """
+    names = pd.Series(names)
+    if names.dtype.kind == 'f':
+        return np.where(names.notna(), 'koi' + names.map('{:.2f}'.format),
+                        None).astype(object)
+    # normalize each distinct name once rather than every row
+    names = names.astype('category')
+    folded = names.cat.categories.astype(str).str.lower().str.replace(
+        r'[\s_-]+', '', regex=True)
+    codes = names.cat.codes.to_numpy()
+    return np.where(codes >= 0, np.asarray(folded, dtype=object)[codes],
+                    None)
+
+
+def keys(data):
+    """
+    Return the normalized identifiers of the planets in the given catalog
+    frame as a list of arrays, one per identifier in IDENTIFIERS. KOI
+    numbers come out the same as KOI names, so a planet named 'KOI-1.01'
+    matches one with KOI number 1.01.
+    """
+    return [normalize(data[name]) for name in IDENTIFIERS]
+
+
+def match(confirmed, kepler):
+    """
+    Return the row of the given confirmed catalog frame matching each row of
+    the given Kepler catalog frame, or -1 if none does, along with the
+    position in IDENTIFIERS of the identifier each was matched by, or -1.
+    Every name any confirmed planet goes by is put in one hash index, and
+    each identifier of the Kepler objects is looked up in it in turn.
+    """
+    names = np.concatenate(keys(confirmed))
+    rows = np.tile(np.arange(len(confirmed)), len(IDENTIFIERS))
+    known = pd.notna(names)
+    # keep the first planet to go by each name
+    index = pd.Series(rows[known], index=names[known])
+    index = index[~index.index.duplicated()]
+
+    found = np.full(len(kepler), -1)
+    by = np.full(len(kepler), -1)
+    for i, names in enumerate(keys(kepler)):
+        looked = index.index.get_indexer(names)
+        new = (found < 0) & (looked >= 0) & pd.notna(names)
+        found[new] = index.to_numpy()[looked[new]]
+        by[new] = i
+    return found, by
+
+
+def path():
+    """
+    Return the file the cross-match of the catalogs is cached in, which
+    changes whenever either catalog does.
+    """
+    key = hashlib.sha1((catalog.cache_dir(CONFIRMED) +
+                        ''.join(IDENTIFIERS)).encode())
+    return os.path.join(catalog.cache_dir(KEPLER),
+                        'crossmatch-%s.npz' % key.hexdigest()[:16])
+
+
+def link():
+    """
+    Return a table with a row for each Kepler object giving its name,
+    whether the Kepler catalog says it is confirmed, the row of the
+    confirmed planet it matches (-1 for none) and the identifier it was
+    matched by, along with whether each of its labels in LABELS agrees with
+    the confirmed planet's, missing for objects with no match. The matches
+    are loaded from the cache when the catalogs haven't changed.
+    """
+    columns = ['P. Name', 'P. Confirmed'] + LABELS
+    kepler = catalog.load(KEPLER, list(dict.fromkeys(columns + IDENTIFIERS)))
+    confirmed = catalog.load(CONFIRMED, list(dict.fromkeys(IDENTIFIERS +
+                                                           LABELS)))
+    target = path()
+    if os.path.exists(target):
+        with np.load(target) as saved:
+            found, by = saved['found'], saved['by']
+    else:
+        found, by = match(confirmed, kepler)
+        with catalog.atomic_write(target) as f:
+            np.savez(f, found=found, by=by)
+
+    linked = kepler[columns].copy()
+    linked['Confirmed Row'] = found
+    linked['Matched By'] = pd.Categorical.from_codes(by, IDENTIFIERS)
+    matched = found >= 0
+    for label in LABELS:
+        theirs = confirmed[label].to_numpy()[found[matched]]
+        agrees = pd.Series(pd.NA, index=linked.index, dtype='boolean')
+        agrees[matched] = kepler[label].to_numpy()[matched] == theirs
+        linked[label + ' Agrees'] = agrees
+    return linked
+
+
+def main():
+    argparse.ArgumentParser(description='Cross-match the Kepler objects '
+                            'with the confirmed exoplanets').parse_args()
+    linked = link()
+    matched = linked['Confirmed Row'] >= 0
+    flagged = linked['P. Confirmed'] == 1
+    print('%d of %d Kepler objects match a confirmed exoplanet' %
+          (matched.sum(), len(linked)))
+    print(linked.loc[matched, 'Matched By'].value_counts().to_string())
+    print('%d are flagged confirmed in the Kepler catalog, %d of those '
+          'matched' % (flagged.sum(), (matched & flagged).sum()))
+    print('%d matched but not flagged confirmed' %
+          (matched & ~flagged).sum())
+    for label in LABELS:
+        agrees = linked[label + ' Agrees']
+        print('%s agrees for %d of %d matched objects' %
+              (label, agrees.sum(), agrees.notna().sum()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# Partitions an exoplanet catalog by the classes its planets fall into so
+# that the plots and models can pull out a class of planets without scanning
+# and copying the whole catalog every time. The rows are sorted once so that
+# the non-habitable planets come first followed by each habitable class, which
+# makes the habitable and non-habitable sets and each habitable class a
+# contiguous run of rows that can be handed out as a view rather than a copy.
+import numpy as np
+import pandas as pd
+
+import clip
+import instrument
+
+# the columns a catalog is partitioned by
+KEYS = ['P. Habitable Class', 'P. Habitable', 'P. Zone Class', 'P. Mass Class',
+        'P. Confirmed']
+
+
+class Dataset:
+    """
+    A catalog along with the positions of the rows holding each value of the
+    columns in KEYS, and masks of the rows inside the bounds of each column
+    they were given for.
+    """
+
+    def __init__(self, data, keys=KEYS, bounds=None):
+        """
+        Partition the given catalog by each of the given columns it has, and
+        mask the rows of each column in the given bounds, a dict from column
+        to its lowest and highest values as made by clip.bounds.
+        """
+        keys = [key for key in keys if key in data.columns]
+        with instrument.span('filter', rows=len(data)):
+            if 'P. Habitable Class' in data.columns:
+                classes = data['P. Habitable Class']
+                flags = data.get('P. Habitable',
+                                 pd.Series(0, index=data.index))
+                order = np.lexsort((flags.to_numpy(),
+                                    pd.factorize(classes, sort=True)[0],
+                                    (classes != 'non-habitable').to_numpy()))
+                data = data.iloc[order]
+            self.data = data.reset_index(drop=True)
+            self._rows = {key: self._partition(self.data[key])
+                          for key in keys}
+            self.masks = clip.masks(self.data, bounds or dict())
+
+    @staticmethod
+    def _partition(column):
+        """
+        Return a dict from each value in the given column to the positions of
+        the rows holding it, worked out in a single sort of the column.
+        """
+        codes, values = pd.factorize(column, sort=True)
+        order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes[codes >= 0], minlength=len(values))
+        missing = np.count_nonzero(codes < 0)
+        bounds = missing + np.r_[0, np.cumsum(counts)]
+        return {value: order[bounds[i]:bounds[i + 1]]
+                for i, value in enumerate(values)}
+
+    def values(self, key):
+        """
+        Return the values the given column is partitioned into.
+        """
+        return list(self._rows[key])
+
+    def rows(self, key, values, exclude=False):
+        """
+        Return the positions of the rows whose value in the given column is
+        one of the given values, or isn't if exclude is True. Returns a slice
+        when the rows are contiguous and an array of positions otherwise.
+        """
+        if exclude:
+            values = [v for v in self._rows[key] if v not in values]
+        parts = [self._rows[key][v] for v in values if v in self._rows[key]]
+        if not parts:
+            return slice(0, 0)
+        positions = np.sort(np.concatenate(parts))
+        if positions[-1] - positions[0] + 1 == len(positions):
+            return slice(positions[0], positions[-1] + 1)
+        return positions
+
+    def subset(self, key, values, exclude=False):
+        """
+        Return the rows whose value in the given column is one of the given
+        values, or isn't if exclude is True. The rows are a view of the
+        catalog when they are contiguous, which every habitable class is.
+        """
+        return self.data.iloc[self.rows(key, values, exclude)]
+
+    def column(self, name, key=None, values=None, exclude=False):
+        """
+        Return the given column as a NumPy array, restricted to the rows
+        picked out by key and values as in subset if a key is given.
+        """
+        column = self.data[name].to_numpy()
+        if key is None:
+            return column
+        return column[self.rows(key, values, exclude)]
+
+    def mask(self, name, key=None, values=None, exclude=False):
+        """
+        Return a boolean array saying which rows have a value of the given
+        column inside its bounds, restricted to the rows picked out by key
+        and values as in subset if a key is given.
+        """
+        mask = self.masks[name]
+        if key is None:
+            return mask
+        return mask[self.rows(key, values, exclude)]
+
+    @property
+    def h(self):
+        """
+        The planets with a habitable class.
+        """
+        return self.subset('P. Habitable Class', ['non-habitable'],
+                           exclude=True)
+
+    @property
+    def nh(self):
+        """
+        The non-habitable planets.
+        """
+        return self.subset('P. Habitable Class', ['non-habitable'])
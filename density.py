@@ -0,0 +1,106 @@
+# Draws a scatterplot of a huge number of points as an image rather than a
+# marker per point. The points are binned into a grid of pixels in a single
+# pass with NumPy, counting the points of each class that fall into each
+# pixel, and every pixel is colored by its class and shaded by how many
+# points it holds. Drawing one image costs the same however many points
+# there are, and the grid takes the same memory however many points there
+# are.
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import matplotlib.pyplot as plt
+from matplotlib.patches import Patch
+
+# the most points drawn as markers before a scatterplot is drawn as a
+# density image instead
+POINT_BUDGET = 50000
+
+# the number of pixels along each side of the grid
+BINS = 256
+
+# how opaque the pixels holding the fewest points are
+FAINTEST = .15
+
+
+def bin_counts(x, y, classes, n_classes, bins, extent):
+    """
+    Return the number of points of each class in each pixel of a grid of
+    the given number of bins along each side covering the given extent, as
+    an array indexed by row, column and class. Points outside the extent or
+    without a class are left out.
+    """
+    left, right, bottom, top = extent
+    col = np.floor((x - left) / (right - left) * bins).astype(np.int64)
+    row = np.floor((y - bottom) / (top - bottom) * bins).astype(np.int64)
+    # the largest values land on the far edge rather than past it
+    col[x == right] = bins - 1
+    row[y == top] = bins - 1
+    keep = (col >= 0) & (col < bins) & (row >= 0) & (row < bins) & \
+        (classes >= 0)
+    index = (row[keep] * bins + col[keep]) * n_classes + classes[keep]
+    counts = np.bincount(index, minlength=bins * bins * n_classes)
+    return counts.reshape(bins, bins, n_classes)
+
+
+def shade(counts, colors, blend=False, log=True):
+    """
+    Return an RGBA image for the given per class counts from bin_counts,
+    coloring each pixel by the class with the most points in it, or with
+    blend by mixing the colors of every class in proportion to their
+    counts. Pixels are more opaque the more points they hold, with the
+    counts log scaled if log is True.
+    """
+    total = counts.sum(axis=2)
+    colors = np.asarray(colors, dtype=float)
+    if blend:
+        rgb = counts @ colors / np.maximum(total, 1)[..., None]
+    else:
+        rgb = colors[counts.argmax(axis=2)]
+    weight = np.log1p(total) if log else total.astype(float)
+    weight = weight / (weight.max() or 1)
+    alpha = np.where(total > 0, FAINTEST + (1 - FAINTEST) * weight, 0)
+    return np.dstack([rgb, alpha])
+
+
+def densityplot(x, y, data, hue=None, hue_order=None, bins=BINS, log=True,
+                blend=False, ax=None):
+    """
+    Draw the y column of data against the x column onto ax, or the current
+    axes if none is given, as a density image with the given number of
+    pixels along each side, colored by the hue column as in shade. Takes the
+    same arguments as seaborn's scatterplot along with those of shade.
+    Returns the axes drawn onto.
+    """
+    if ax is None:
+        ax = plt.gca()
+    columns = [x, y] if hue is None else [x, y, hue]
+    d = data[columns].dropna()
+    if len(d) == 0:
+        return ax
+    xs = d[x].to_numpy(dtype=float)
+    ys = d[y].to_numpy(dtype=float)
+    if hue is None:
+        hue_order = [None]
+        classes = np.zeros(len(d), dtype=np.int64)
+    else:
+        if hue_order is None:
+            hue_order = list(pd.unique(d[hue]))
+        classes = pd.Categorical(d[hue], categories=hue_order).codes.astype(
+            np.int64)
+    colors = sns.color_palette(n_colors=len(hue_order))
+
+    extent = [xs.min(), xs.max(), ys.min(), ys.max()]
+    # keep the grid from collapsing when every value is the same
+    for i in (0, 2):
+        if extent[i] == extent[i + 1]:
+            extent[i], extent[i + 1] = extent[i] - .5, extent[i + 1] + .5
+    counts = bin_counts(xs, ys, classes, len(hue_order), bins, extent)
+    ax.imshow(shade(counts, colors, blend, log), origin='lower',
+              extent=extent, aspect='auto', interpolation='nearest')
+    if hue is not None:
+        ax.legend(handles=[Patch(color=c, label=str(h))
+                           for c, h in zip(colors, hue_order)], title=hue)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.grid(False)
+    return ax
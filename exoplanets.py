@@ -0,0 +1,151 @@
+# A single command line for the project, with a subcommand for each task:
+#
+#   exoplanets.py plot [name ...]         draw the named plots, or every one
+#   exoplanets.py plot --wide [name ...]  draw the named wide plots
+#   exoplanets.py model train|score       train or score the saved models
+#   exoplanets.py stats                   draw every plot and evaluate models
+#
+# Only argparse, os and instrument are imported up front. Each subcommand
+# imports the modules it needs when it runs, so plotting never loads
+# scikit-learn, the models never load seaborn or matplotlib, and --help
+# loads neither.
+import argparse
+import os
+
+import instrument
+
+
+def plot(parser, args):
+    """
+    Draw the plots named in the given parsed arguments, or every one if none
+    are named.
+    """
+    if args.wide:
+        import wide_plots
+        known = list(wide_plots.SPECS)
+    else:
+        import stats_functions
+        known = [name for _, _, name, _, _, _ in stats_functions.PLOTS]
+    for name in args.names:
+        if name not in known:
+            parser.error('no plots named %r, choose from %s' %
+                         (name, ', '.join(known)))
+    if args.wide:
+        # the wide plots are always drawn in this process, with no manifest
+        # of which are up to date
+        for flag, given in (('--jobs', args.jobs != 1),
+                            ('--force', args.force),
+                            ('--dry-run', args.dry_run)):
+            if given:
+                parser.error('%s can\'t be used with --wide' % flag)
+    if args.wide:
+        import plots
+        plots.configure(args.format, args.compress_level, args.pdf)
+        wide_plots.plot(args.names or known)
+    else:
+        stats_functions.plot(args, args.names or None)
+
+
+def model(parser, args):
+    """
+    Train or score the saved models, as in models.py.
+    """
+    import models
+    models.run(args)
+
+
+def stats(parser, args):
+    """
+    Draw every plot and evaluate the models, as in stats_functions.py.
+    """
+    import stats_functions
+    stats_functions.run(args)
+
+
+def positive(text):
+    """
+    Return the given argument as a whole number of at least 1, for argparse.
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError('%r is not a whole number' % text)
+    if value < 1:
+        raise argparse.ArgumentTypeError('%r is less than 1' % text)
+    return value
+
+
+def add_plot_arguments(parser):
+    """
+    Add the options for drawing the plots to the given argument parser.
+    """
+    parser.add_argument('-j', '--jobs', type=positive, default=1,
+                        help='number of processes to draw the plots with')
+    parser.add_argument('--force', action='store_true',
+                        help='draw every plot, even ones that are up to date')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='list the plots that would be drawn and stop')
+    # the formats and compression levels of writer.py, which isn't imported
+    # until a plot is drawn
+    parser.add_argument('--format', nargs='+', default=['png'],
+                        choices=['png', 'svg', 'pdf'],
+                        help='formats to save each plot in')
+    parser.add_argument('--compress-level', type=int, default=6,
+                        choices=range(10), metavar='0-9',
+                        help='zlib level PNGs are compressed with, 0 is '
+                        'fastest and 9 smallest')
+    parser.add_argument('--pdf', metavar='FILE',
+                        help='also save every plot drawn as a page of a '
+                        'single PDF, drawing them all in one process')
+
+
+def add_model_arguments(parser):
+    """
+    Add the train or score command and the training options to the given
+    argument parser.
+    """
+    parser.add_argument('command', choices=['train', 'score'])
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for the folds and trees')
+    parser.add_argument('--folds', type=int, default=5,
+                        help='number of cross-validation folds')
+    parser.add_argument('-j', '--jobs', type=positive, default=os.cpu_count(),
+                        help='processes to search with, every core by '
+                        'default')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plot and model the '
+                                     'habitability of exoplanets')
+    instrument.add_arguments(parser)
+    commands = parser.add_subparsers(dest='task', required=True)
+
+    plotter = commands.add_parser('plot', help='draw some or all of the plots')
+    plotter.add_argument('names', nargs='*',
+                         help='plots to draw, every one if none are given')
+    plotter.add_argument('--wide', action='store_true',
+                         help='draw the wide plots of wide_plots.py instead, '
+                         'without --jobs, --force or --dry-run')
+    add_plot_arguments(plotter)
+    plotter.set_defaults(run=plot)
+
+    modeller = commands.add_parser('model', help='train or score the models')
+    add_model_arguments(modeller)
+    modeller.set_defaults(run=model)
+
+    summary = commands.add_parser('stats', help='draw every plot and '
+                                  'evaluate the models')
+    add_plot_arguments(summary)
+    summary.add_argument('--multi-output', action='store_true',
+                         help='predict habitability and habitable class with '
+                         'a single tree rather than one tree each')
+    summary.set_defaults(run=stats)
+
+    args = parser.parse_args()
+    instrument.start(args)
+    args.run(commands.choices[args.task], args)
+    instrument.finish(args)
+
+
+if __name__ == '__main__':
+    main()
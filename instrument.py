@@ -0,0 +1,172 @@
+# Times the stages of the pipeline. Each stage is wrapped in a span, and spans
+# can be nested, so a plot's span holds the spans for laying out its points,
+# drawing it and saving it. Every span records how long it took and how much
+# memory the process was using, one stage can be run under cProfile, and the
+# spans can be saved as a Chrome trace (chrome://tracing or ui.perfetto.dev)
+# or printed as a summary.
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, where memory isn't recorded
+    resource = None
+
+# every span that has finished in this process, as Chrome trace events
+_events = list()
+
+# the names of the spans currently open in each thread, innermost last, as
+# spans are opened from the writer's and server's threads as well
+_open = threading.local()
+
+# the stage being profiled, the file its profile is saved to and the profiler
+_profile = {'stage': None, 'path': None, 'profiler': None}
+
+
+def _opened():
+    """
+    Return the names of the spans currently open in this thread.
+    """
+    if not hasattr(_open, 'names'):
+        _open.names = list()
+    return _open.names
+
+
+def _max_rss():
+    """
+    Return the most memory in MB this process has used so far, or None if
+    that can't be found out on this platform.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes everywhere else
+    scale = 2 ** 20 if os.uname().sysname == 'Darwin' else 2 ** 10
+    return rss / scale
+
+
+def profile(stage, path=None):
+    """
+    Run every span with the given name under cProfile, saving the combined
+    profile to the given path, or the stage's name with .prof on the end.
+    """
+    _profile['stage'] = stage
+    _profile['path'] = path or stage.replace(' ', '_') + '.prof'
+    _profile['profiler'] = cProfile.Profile()
+
+
+@contextmanager
+def span(name, **args):
+    """
+    Time the code run inside this context as a stage with the given name,
+    recording any keyword arguments along with it. Yields the trace event for
+    the span, whose 'dur' is filled in, in microseconds, once it finishes.
+    """
+    event = {'name': name, 'ph': 'X', 'pid': os.getpid(),
+             'tid': threading.get_ident(), 'ts': time.time() * 1e6,
+             'args': dict(args, depth=len(_opened()))}
+    rss = _max_rss()
+    profiler = _profile['profiler'] if name == _profile['stage'] else None
+    if profiler is not None:
+        profiler.enable()
+    _opened().append(name)
+    start = time.perf_counter()
+    try:
+        yield event
+    finally:
+        event['dur'] = (time.perf_counter() - start) * 1e6
+        _opened().pop()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(_profile['path'])
+        if rss is not None:
+            event['args']['max_rss_mb'] = _max_rss()
+            event['args']['rss_growth_mb'] = _max_rss() - rss
+        _events.append(event)
+
+
+def events():
+    """
+    Return the events for every span that has finished in this process.
+    """
+    return list(_events)
+
+
+def merge(more):
+    """
+    Add events recorded in another process, such as a worker, to this one.
+    """
+    _events.extend(more)
+
+
+def clear():
+    """
+    Forget every span recorded so far.
+    """
+    del _events[:]
+
+
+def export(path):
+    """
+    Save every span recorded so far to the given path as a Chrome trace.
+    """
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': sorted(_events, key=lambda e: e['ts']),
+                   'displayTimeUnit': 'ms'}, f)
+
+
+def summary():
+    """
+    Print the number of times each stage ran and the total time spent in it,
+    indented by how deeply it was nested, in the order the stages started.
+    """
+    totals = dict()
+    for event in sorted(_events, key=lambda e: e['ts']):
+        key = (event['args']['depth'], event['name'])
+        count, seconds, rss = totals.get(key, (0, 0, None))
+        peak = event['args'].get('max_rss_mb')
+        if peak is not None:
+            rss = max(peak, rss or 0)
+        totals[key] = (count + 1, seconds + event['dur'] / 1e6, rss)
+    for (depth, name), (count, seconds, rss) in totals.items():
+        line = '%-32s %5dx %10.4f seconds' % ('  ' * depth + name,
+                                              count, seconds)
+        if rss is not None:
+            line += '   peak rss %8.1f MB' % rss
+        print(line)
+
+
+def add_arguments(parser):
+    """
+    Add the --trace and --profile options to the given argument parser.
+    """
+    parser.add_argument('--trace', metavar='FILE',
+                        help='save a Chrome trace of every stage to FILE')
+    parser.add_argument('--profile', metavar='STAGE',
+                        help='run every span named STAGE under cProfile, '
+                        'saving the profile to STAGE.prof')
+
+
+def start(args):
+    """
+    Start profiling the stage asked for by the given parsed arguments.
+    """
+    if args.profile:
+        profile(args.profile)
+
+
+def finish(args):
+    """
+    Print a summary of every stage, saving the trace if the given parsed
+    arguments ask for one.
+    """
+    print()
+    summary()
+    if args.trace:
+        export(args.trace)
+        print('saved trace to', args.trace)
@@ -0,0 +1,78 @@
+# Load tests the prediction server. Stars are drawn from the confirmed
+# exoplanet catalog and sent to the server by a number of clients at once,
+# each sending its next request as soon as the last one is answered, and the
+# latency percentiles and throughput are reported for each number of
+# clients.
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import matrix
+
+
+def stars(count, seed=0):
+    """
+    Return the given number of stars drawn from the confirmed catalog, each
+    a dict of the features the models take.
+    """
+    X = matrix.load('phl_hec_all_confirmed.csv').X
+    picked = np.random.default_rng(seed).choice(len(X), count)
+    return [dict(zip(matrix.FEATURES, row.tolist())) for row in X[picked]]
+
+
+def request(url, body):
+    """
+    Send the given json encoded body to the server, returning how many
+    seconds it took to be answered.
+    """
+    start = time.perf_counter()
+    post = urllib.request.Request(url, body, method='POST', headers={
+        'Content-Type': 'application/json'})
+    with urllib.request.urlopen(post) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def load_test(url, bodies, clients):
+    """
+    Send every one of the given bodies to the server from the given number
+    of clients at once. Returns the latency of each request in seconds and
+    the number of seconds they all took.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        latencies = list(pool.map(lambda body: request(url, body), bodies))
+    return np.array(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the prediction '
+                                     'server')
+    parser.add_argument('--url', default='http://127.0.0.1:8163/predict')
+    parser.add_argument('--clients', type=int, nargs='+',
+                        default=[1, 4, 16, 64],
+                        help='numbers of clients sending at once')
+    parser.add_argument('--requests', type=int, default=2000,
+                        help='requests sent for each number of clients')
+    parser.add_argument('--stars', type=int, default=1,
+                        help='stars scored in each request')
+    args = parser.parse_args()
+
+    sample = stars(args.requests * args.stars)
+    bodies = [json.dumps(sample[i:i + args.stars]).encode()
+              for i in range(0, len(sample), args.stars)]
+    print('%7s %10s %10s %10s %14s' % ('clients', 'p50 ms', 'p95 ms',
+                                       'p99 ms', 'requests/s'))
+    for clients in args.clients:
+        latencies, seconds = load_test(args.url, bodies, clients)
+        p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+        print('%7d %10.2f %10.2f %10.2f %14.1f' %
+              (clients, p50, p95, p99, len(bodies) / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Keeps track of what each figure was last drawn from so that figures whose
+# inputs haven't changed don't need to be drawn again. A figure's key is a
+# hash of the columns of data it reads along with the source code that draws
+# it, which holds all of its plot parameters, and the keys of the figures on
+# disk are saved to a json manifest next to them.
+import hashlib
+import inspect
+import json
+import os
+
+import pandas as pd
+
+MANIFEST = '.figures.json'
+
+
+def frame_hash(frame, columns):
+    """
+    Return a hash of the values in the given columns of the given frame.
+    """
+    sha = hashlib.sha1()
+    for name in columns:
+        if name in frame.columns:
+            sha.update(name.encode())
+            hashes = pd.util.hash_pandas_object(frame[name], index=False)
+            sha.update(hashes.to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def plot_key(code, frames, columns, params=None):
+    """
+    Return the key for a figure drawn by the given functions or modules from
+    the given frames, reading the given columns of each, with the given plot
+    parameters.
+    """
+    sha = hashlib.sha1()
+    for c in code:
+        sha.update(inspect.getsource(c).encode())
+    sha.update(repr(params).encode())
+    for frame in frames:
+        sha.update(frame_hash(frame, columns).encode())
+    return sha.hexdigest()
+
+
+class Manifest:
+    """
+    The keys of the figures that have been drawn, saved as json.
+    """
+
+    def __init__(self, path=MANIFEST):
+        """
+        Read in the manifest at the given path, starting an empty one if
+        there isn't one yet.
+        """
+        self.path = path
+        self.keys = dict()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.keys = json.load(f)
+
+    def stale(self, outputs, key):
+        """
+        Return whether any of the given output files is missing or was drawn
+        from something other than the given key.
+        """
+        return any(not os.path.exists(out) or self.keys.get(out) != key
+                   for out in outputs)
+
+    def record(self, outputs, key):
+        """
+        Note that the given output files have been drawn from the given key.
+        """
+        for out in outputs:
+            self.keys[out] = key
+
+    def save(self):
+        """
+        Write the manifest back out to disk.
+        """
+        with open(self.path, 'w') as f:
+            json.dump(self.keys, f, indent=2, sort_keys=True)
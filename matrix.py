@@ -0,0 +1,136 @@
+# Builds the feature matrix the habitability models are trained, tested and
+# scored on. The star attributes of every usable row of a catalog are packed
+# into one contiguous float32 array, with the habitability and habitable
+# class of the same rows alongside it, so training and scoring index into
+# arrays rather than slicing and filtering DataFrames again for each model.
+# A catalog's matrix is saved in the catalog's cache the first time it is
+# built and loaded from there after that, and goes away with the cache when
+# the csv changes.
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+import catalog
+import instrument
+
+# the star attributes the models predict from
+FEATURES = ['S. Mass (SU)', 'S. Radius (SU)', 'S. Teff (K)',
+            'S. Luminosity (SU)', 'S. [Fe/H]', 'S. Age (Gyrs)',
+            'S. Mag from Planet', 'S. Size from Planet (deg)']
+
+# what the models predict
+TARGETS = ['P. Habitable', 'P. Habitable Class']
+
+
+@dataclass(frozen=True)
+class FeatureMatrix:
+    """
+    The features of the usable rows of a catalog as a float32 array with a
+    row per planet and a column per feature, the value of each target for
+    those rows and the positions of the rows in the catalog.
+    """
+    X: np.ndarray
+    targets: dict
+    rows: np.ndarray
+
+    def __len__(self):
+        return len(self.X)
+
+    def codes(self):
+        """
+        Return the targets as one integer array with a column per target in
+        TARGETS, for training a single model to predict all of them, along
+        with the labels each column's codes stand for.
+        """
+        labels = list()
+        Y = np.empty((len(self), len(TARGETS)), dtype=np.int64)
+        for i, target in enumerate(TARGETS):
+            values, Y[:, i] = np.unique(self.targets[target],
+                                        return_inverse=True)
+            labels.append(values)
+        return Y, labels
+
+    def hash(self):
+        """
+        Return a hash of the features and targets.
+        """
+        sha = hashlib.sha1(self.X.tobytes())
+        for target in sorted(self.targets):
+            sha.update(target.encode())
+            sha.update(self.targets[target].tobytes())
+        return sha.hexdigest()
+
+
+def extract(frame):
+    """
+    Return the features of the given frame as a contiguous float32 array,
+    along with a mask of the rows that have every feature.
+    """
+    X = np.ascontiguousarray(frame[FEATURES].to_numpy(dtype=np.float32))
+    return X, ~np.isnan(X).any(axis=1)
+
+
+def build(frame, confirmed=None):
+    """
+    Return the feature matrix of the rows of the given catalog frame with
+    every feature and target known, keeping only the confirmed exoplanets if
+    confirmed is 1 or only the unconfirmed objects if it is 0.
+    """
+    X, keep = extract(frame)
+    for target in TARGETS:
+        keep &= frame[target].notna().to_numpy()
+    if confirmed is not None:
+        keep &= frame['P. Confirmed'].to_numpy() == confirmed
+    rows = np.flatnonzero(keep)
+    targets = {target: frame[target].to_numpy()[rows].astype(
+        np.int8 if target == 'P. Habitable' else str) for target in TARGETS}
+    return FeatureMatrix(X[rows], targets, rows)
+
+
+def decode(Y, labels):
+    """
+    Return a dict from each target to its labels for the given array of
+    codes predicted by a model trained on FeatureMatrix.codes.
+    """
+    return {target: labels[i][Y[:, i]] for i, target in enumerate(TARGETS)}
+
+
+def path(csv, confirmed=None):
+    """
+    Return the file the feature matrix of the catalog csv at the given path
+    is cached in, which changes with the csv, the features and the targets.
+    """
+    key = hashlib.sha1(json.dumps([FEATURES, TARGETS, confirmed]).encode())
+    return os.path.join(catalog.cache_dir(csv),
+                        'features-%s.npz' % key.hexdigest()[:16])
+
+
+def load(csv, confirmed=None):
+    """
+    Return the feature matrix of the catalog csv at the given path, filtered
+    by confirmed as in build, loading it from the cache when it has already
+    been built.
+    """
+    with instrument.span('features', file=os.path.basename(csv)):
+        target = path(csv, confirmed)
+        if os.path.exists(target):
+            with np.load(target) as saved:
+                return FeatureMatrix(saved['X'],
+                                     {t: saved['y%d' % i]
+                                      for i, t in enumerate(TARGETS)},
+                                     saved['rows'])
+
+        # loading the columns builds the catalog's cache the matrix is saved
+        # in if it doesn't exist yet
+        columns = FEATURES + TARGETS
+        if confirmed is not None:
+            columns = columns + ['P. Confirmed']
+        matrix = build(catalog.load(csv, columns), confirmed)
+        with catalog.atomic_write(target) as f:
+            np.savez(f, X=matrix.X, rows=matrix.rows,
+                     **{'y%d' % i: matrix.targets[t]
+                        for i, t in enumerate(TARGETS)})
+        return matrix
@@ -0,0 +1,252 @@
+# Works out the habitability metrics the catalogs carry from the attributes
+# of each planet's star and orbit, so they can be filled in for planets that
+# lack them and worked out for new candidates. Every metric is a NumPy
+# expression over whole columns, so a catalog of any size is done at once
+# with no Python code run per planet. The formulas are the ones the catalogs
+# were made with:
+#
+#   habitable zone  the Recent Venus and Early Mars limits of Kopparapu et
+#                   al. (2014), with the star's temperature held to the
+#                   2600 K to 7200 K their fits cover
+#   mean distance   a * sqrt(1 - e^2)
+#   stellar flux    L / r^2 at periastron and apastron, and the flux
+#                   averaged over the orbit, L / (a^2 * sqrt(1 - e^2))
+#   Teq             the equilibrium temperature for a Bond albedo of 0.3 at
+#                   periastron and apastron, and averaged over the orbit
+#   HZD             where the planet is across the habitable zone, -1 at its
+#                   inner edge and +1 at its outer one
+#   ESI             the Earth Similarity Index from radius and stellar flux
+#
+# Planets with no eccentricity are taken to be on circular orbits, and
+# planets with a luminosity, temperature or semi-major axis that isn't
+# positive, a negative radius or an eccentricity outside 0 to 1 get no
+# metrics from it. validate compares the metrics with the ones already in a
+# catalog. HZC, HZA and HZI depend on the planet's mass and on models of its
+# composition and atmosphere, so they aren't worked out here.
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import catalog
+
+LUMINOSITY = 'S. Luminosity (SU)'
+TEFF = 'S. Teff (K)'
+RADIUS = 'P. Radius (EU)'
+AXIS = 'P. Sem Major Axis (AU)'
+ECCENTRICITY = 'P. Eccentricity'
+
+# the columns the metrics are worked out from
+INPUTS = [LUMINOSITY, TEFF, RADIUS, AXIS, ECCENTRICITY]
+
+# the coefficients of the polynomial in how much hotter a star is than the
+# Sun giving the stellar flux at each edge of its habitable zone, from
+# Kopparapu et al. (2014), and the temperatures they were fit over
+SUN_TEFF = 5780
+TEFF_RANGE = (2600, 7200)
+RECENT_VENUS = (1.776, 2.136e-4, 2.533e-8, -1.332e-11, -3.097e-15)
+EARLY_MARS = (0.32, 5.547e-5, 1.526e-9, -2.874e-12, -5.011e-16)
+
+# the Bond albedo the equilibrium temperatures are for, and the temperature
+# of a black body getting the Earth's flux
+ALBEDO = .3
+BLACK_BODY = 278.5
+
+# the points along an orbit the equilibrium temperature is averaged over
+ORBIT_STEPS = 64
+
+# the smallest difference from the catalog's value, in the catalog's
+# rounding, and the relative difference, still counted as agreeing
+ATOL = {'S. Hab Zone Min (AU)': .001, 'S. Hab Zone Max (AU)': .001,
+        'P. Mean Distance (AU)': .01, 'P. SFlux Min (EU)': .001,
+        'P. SFlux Mean (EU)': .001, 'P. SFlux Max (EU)': .001,
+        'P. Teq Min (K)': .1, 'P. Teq Mean (K)': .1, 'P. Teq Max (K)': .1,
+        'P. HZD': .01, 'P. ESI': .01}
+RTOL = .01
+
+# every metric worked out, in the order they are
+METRICS = list(ATOL)
+
+
+def habitable_zone(luminosity, teff):
+    """
+    Return the inner and outer edges in AU of the habitable zone of stars
+    with the given luminosities in solar units and temperatures in kelvin.
+    """
+    t = np.clip(teff, *TEFF_RANGE) - SUN_TEFF
+    # polyval takes the highest power first
+    inner = np.sqrt(luminosity / np.polyval(RECENT_VENUS[::-1], t))
+    outer = np.sqrt(luminosity / np.polyval(EARLY_MARS[::-1], t))
+    return inner, outer
+
+
+def flux(luminosity, distance):
+    """
+    Return the stellar flux in Earth units at the given distances in AU from
+    stars with the given luminosities in solar units.
+    """
+    return luminosity / distance ** 2
+
+
+def equilibrium_temperature(flux, albedo=ALBEDO):
+    """
+    Return the equilibrium temperature in kelvin of planets getting the
+    given stellar flux in Earth units with the given Bond albedo.
+    """
+    return BLACK_BODY * ((1 - albedo) * flux) ** .25
+
+
+def orbit_average(e, power):
+    """
+    Return the average over time of the distance from the star, as a
+    fraction of the semi-major axis, to the given power for orbits with the
+    given eccentricities. Each step adds up every eccentric orbit at one
+    point along it, so the work is ORBIT_STEPS passes over them however
+    many there are, and circular orbits, where the average is 1, are
+    skipped. Orbits with no eccentricity given have no average.
+    """
+    average = np.where(np.isnan(e), np.nan, 1)
+    eccentric = np.flatnonzero(e > 0)
+    total = np.zeros(len(eccentric))
+    # equal steps in eccentric anomaly, weighted by the time spent in each
+    for anomaly in (np.arange(ORBIT_STEPS) + .5) * 2 * np.pi / ORBIT_STEPS:
+        total += (1 - e[eccentric] * np.cos(anomaly)) ** (power + 1)
+    average[eccentric] = total / ORBIT_STEPS
+    return average
+
+
+def hzd(distance, inner, outer):
+    """
+    Return the habitable zone distance of planets at the given distances
+    from habitable zones with the given edges, -1 at the inner edge, 0 in
+    the middle and +1 at the outer edge.
+    """
+    return (2 * distance - inner - outer) / (outer - inner)
+
+
+def similarity(value, earth):
+    """
+    Return how far the given values are from the Earth's relative to their
+    sum, 0 when they are the same and nearing 1 or -1 as they differ.
+    """
+    return (value - earth) / (value + earth)
+
+
+def esi(radius, flux):
+    """
+    Return the Earth Similarity Index of planets with the given radii and
+    stellar flux in Earth units.
+    """
+    return 1 - np.sqrt((similarity(radius, 1) ** 2 +
+                        similarity(flux, 1) ** 2) / 2)
+
+
+def compute(data):
+    """
+    Return a frame with the same rows as the given catalog frame and a
+    column for each of METRICS, named as in the catalogs, worked out from
+    its INPUTS columns. Planets missing an input, or with one that can't be
+    right, are missing the metrics that depend on it.
+    """
+    luminosity, teff, radius, a, e = [
+        data[name].to_numpy(dtype=np.float64) for name in INPUTS]
+    e = np.nan_to_num(e)
+    luminosity = np.where(luminosity <= 0, np.nan, luminosity)
+    teff = np.where(teff <= 0, np.nan, teff)
+    radius = np.where(radius < 0, np.nan, radius)
+    a = np.where(a <= 0, np.nan, a)
+    e = np.where((e < 0) | (e >= 1), np.nan, e)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        metrics = _metrics(luminosity, teff, radius, a, e)
+    return pd.DataFrame({name: metrics[name].astype(np.float32)
+                         for name in METRICS}, index=data.index)
+
+
+def _metrics(luminosity, teff, radius, a, e):
+    """
+    Return a dict from each of METRICS to its values worked out from the
+    given arrays of INPUTS.
+    """
+    inner, outer = habitable_zone(luminosity, teff)
+    closest, farthest = a * (1 - e), a * (1 + e)
+    mean = flux(luminosity, a) / np.sqrt(1 - e ** 2)
+    return {
+        'S. Hab Zone Min (AU)': inner, 'S. Hab Zone Max (AU)': outer,
+        'P. Mean Distance (AU)': a * np.sqrt(1 - e ** 2),
+        'P. SFlux Min (EU)': flux(luminosity, farthest),
+        'P. SFlux Mean (EU)': mean,
+        'P. SFlux Max (EU)': flux(luminosity, closest),
+        'P. Teq Min (K)': equilibrium_temperature(
+            flux(luminosity, farthest)),
+        'P. Teq Mean (K)': equilibrium_temperature(flux(luminosity, a)) *
+        orbit_average(e, -.5),
+        'P. Teq Max (K)': equilibrium_temperature(flux(luminosity, closest)),
+        'P. HZD': hzd(a, inner, outer), 'P. ESI': esi(radius, mean)}
+
+
+def fill(data, metrics=None):
+    """
+    Return a copy of the given catalog frame with the missing values of
+    each of METRICS it has filled in from the given metrics of its rows, or
+    from compute if none are given.
+    """
+    if metrics is None:
+        metrics = compute(data)
+    filled = data.copy()
+    for name in METRICS:
+        if name in filled.columns:
+            filled[name] = filled[name].fillna(metrics[name])
+    return filled
+
+
+def validate(data, metrics=None):
+    """
+    Return a frame with a row for each of METRICS in the given catalog
+    frame, giving how many planets have it both in the catalog and from
+    compute, the share of those agreeing within ATOL and RTOL, the median
+    and largest relative difference, and how many planets missing it in
+    the catalog it can be filled in for.
+    """
+    if metrics is None:
+        metrics = compute(data)
+    rows = dict()
+    for name in METRICS:
+        if name not in data.columns:
+            continue
+        theirs = data[name].to_numpy(dtype=np.float64)
+        mine = metrics[name].to_numpy(dtype=np.float64)
+        both = ~np.isnan(theirs) & ~np.isnan(mine)
+        difference = np.abs(mine[both] - theirs[both]) / \
+            np.maximum(np.abs(theirs[both]), ATOL[name])
+        agrees = np.isclose(mine[both], theirs[both], rtol=RTOL,
+                            atol=ATOL[name])
+        rows[name] = {
+            'compared': int(both.sum()),
+            'agrees': agrees.mean() if both.any() else np.nan,
+            'median difference': np.median(difference) if both.any()
+            else np.nan,
+            'largest difference': difference.max() if both.any()
+            else np.nan,
+            'fillable': int((np.isnan(theirs) & ~np.isnan(mine)).sum())}
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the habitability '
+                                     'metrics worked out from each planet\'s '
+                                     'star and orbit against the catalogs')
+    parser.add_argument('catalogs', nargs='*',
+                        default=['phl_hec_all_confirmed.csv',
+                                 'phl_hec_all_kepler.csv'])
+    args = parser.parse_args()
+    for path in args.catalogs:
+        columns = [name for name in INPUTS + METRICS
+                   if name in catalog.dtypes(path)]
+        report = validate(catalog.load(path, columns))
+        print(path)
+        print(report.to_string(float_format='%.4f'))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+# Trains the habitability and habitable class models once and keeps them.
+# Rather than fitting a single tree on one random split every run, training
+# runs a cross-validated search over the tree's settings on every core, and
+# the best tree for each target is saved to disk along with the features it
+# was trained on and a hash of the data, so that scoring new objects just
+# loads the saved models instead of fitting them again.
+import argparse
+import os
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import (GridSearchCV, StratifiedKFold,
+                                     train_test_split)
+from sklearn.tree import DecisionTreeClassifier
+
+import exoplanets
+import instrument
+import matrix
+
+MODELS = 'models'
+
+# the tree settings searched over
+GRID = {'criterion': ['gini', 'entropy'],
+        'max_depth': [None, 2, 4, 6, 8, 12, 16],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'class_weight': [None, 'balanced']}
+
+
+def path(target):
+    """
+    Return the file the model for the given target is saved to.
+    """
+    name = target.lower().replace('.', '').replace(' ', '_')
+    return os.path.join(MODELS, name + '.joblib')
+
+
+def train(features, seed=0, folds=5, jobs=-1):
+    """
+    Search for the best tree for each target on the given feature matrix
+    with cross-validation, using the given number of processes (-1 for every
+    core), and save each one. The folds and trees are seeded so training is
+    reproducible. Returns a dict from each target to its saved bundle.
+    """
+    bundles = dict()
+    for target in matrix.TARGETS:
+        y = features.targets[target]
+        split = StratifiedKFold(folds, shuffle=True, random_state=seed)
+        search = GridSearchCV(DecisionTreeClassifier(random_state=seed),
+                              GRID, cv=split, n_jobs=jobs)
+        with instrument.span('fit', target=target, rows=len(features)):
+            search.fit(features.X, y)
+
+        bundle = {'model': search.best_estimator_, 'target': target,
+                  'features': matrix.FEATURES, 'params': search.best_params_,
+                  'cv_score': search.best_score_, 'seed': seed,
+                  'data_hash': features.hash()}
+        os.makedirs(MODELS, exist_ok=True)
+        joblib.dump(bundle, path(target))
+        bundles[target] = bundle
+    return bundles
+
+
+def load(target):
+    """
+    Return the saved bundle for the given target, a dict holding the model
+    along with the features it takes, its settings, its cross-validated
+    accuracy and the hash of the data it was trained on.
+    """
+    if not os.path.exists(path(target)):
+        raise FileNotFoundError('no model saved for %s, train one first' %
+                                target)
+    return joblib.load(path(target))
+
+
+def predict(bundle, X):
+    """
+    Return the saved model's predictions for the rows of the given float32
+    feature array, whose columns are the features in matrix.FEATURES.
+    """
+    with instrument.span('predict', target=bundle['target'], rows=len(X)):
+        return bundle['model'].predict(X)
+
+
+def predict_proba(bundle, X):
+    """
+    Return the saved model's predictions for the rows of the given feature
+    array along with how likely the model thinks each prediction is, worked
+    out in a single pass over the tree.
+    """
+    model = bundle['model']
+    with instrument.span('predict', target=bundle['target'], rows=len(X)):
+        proba = model.predict_proba(X)
+    best = proba.argmax(axis=1)
+    return model.classes_[best], proba[np.arange(len(proba)), best]
+
+
+def stale(bundle, features):
+    """
+    Return whether the given feature matrix has changed since the bundle's
+    model was trained on it.
+    """
+    return features.hash() != bundle['data_hash']
+
+
+def evaluate(confirmed, kepler, multi_output=False):
+    """
+    Creates models for predicting the habitability and habitable class of
+    different exoplanets and Kepler objects based on characteristics of the
+    stars they revolve around, from the feature matrices of the confirmed
+    exoplanets and of the Kepler objects that haven't been confirmed. Both
+    are trained and tested on the same split of the confirmed exoplanets,
+    either as a tree for each or, with multi_output, as a single tree
+    predicting both at once. Prints accuracy scores for both in making
+    predictions based on both confirmed exoplanets and Kepler objects.
+    """
+    X = confirmed.X
+    train, test = train_test_split(np.arange(len(confirmed)), test_size=.2)
+
+    if multi_output:
+        # Models habitability and habitable class together based on
+        # characteristics of confirmed exoplanets, and tests the model on
+        # the unconfirmed Kepler objects
+
+        Y, labels = confirmed.codes()
+        model = DecisionTreeClassifier()
+        with instrument.span('fit', target='both'):
+            model.fit(X[train], Y[train])
+        with instrument.span('predict', target='both'):
+            y_pred = matrix.decode(model.predict(X[test]), labels)
+        with instrument.span('predict', target='both'):
+            kepler_pred = matrix.decode(model.predict(kepler.X), labels)
+    else:
+        # Models habitability and habitable class separately based on
+        # characteristics of confirmed exoplanets, and tests each model on
+        # the unconfirmed Kepler objects
+
+        y_pred, kepler_pred = dict(), dict()
+        for target in matrix.TARGETS:
+            model = DecisionTreeClassifier()
+            with instrument.span('fit', target=target):
+                model.fit(X[train], confirmed.targets[target][train])
+            with instrument.span('predict', target=target):
+                y_pred[target] = model.predict(X[test])
+            with instrument.span('predict', target=target):
+                kepler_pred[target] = model.predict(kepler.X)
+
+    for target, name in [('P. Habitable', 'Habitability'),
+                         ('P. Habitable Class', 'Habitable Class')]:
+        print('Confirmed Exoplanet %s Accuracy Score:' % name)
+        print(accuracy_score(confirmed.targets[target][test],
+                             y_pred[target]))
+        print('Kepler Object %s Accuracy Score:' % name)
+        print(accuracy_score(kepler.targets[target], kepler_pred[target]))
+
+
+def run(args):
+    """
+    Train the models, or score the unconfirmed Kepler objects with the saved
+    ones, as the given parsed arguments ask.
+    """
+    confirmed = matrix.load('phl_hec_all_confirmed.csv')
+    if args.command == 'train':
+        for target, bundle in train(confirmed, args.seed, args.folds,
+                                    args.jobs).items():
+            print('%s: cross-validated accuracy %.4f with %s, saved to %s' %
+                  (target, bundle['cv_score'], bundle['params'],
+                   path(target)))
+    else:
+        # only the Kepler objects that haven't been confirmed, the confirmed
+        # ones are already in the confirmed catalog
+        kepler = matrix.load('phl_hec_all_kepler.csv', confirmed=0)
+        for target in matrix.TARGETS:
+            bundle = load(target)
+            if stale(bundle, confirmed):
+                print('warning: the confirmed catalog has changed since the '
+                      '%s model was trained' % target)
+            print('Kepler Object %s Accuracy Score:' % target)
+            print(accuracy_score(kepler.targets[target],
+                                 predict(bundle, kepler.X)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train or score with the '
+                                     'saved habitability models')
+    exoplanets.add_model_arguments(parser)
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+    run(args)
+    instrument.finish(args)
+
+
+if __name__ == '__main__':
+    main()
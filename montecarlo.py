@@ -0,0 +1,222 @@
+# Propagates the uncertainty in each planet's star attributes through the
+# saved habitability models. Rather than one hard label per planet, every
+# planet's features are perturbed SAMPLES times according to RELATIVE and
+# ABSOLUTE and each perturbed copy is scored, so the share of copies given
+# each class is how likely the planet is to be in it. The copies are drawn
+# and scored in blocks of samples x planets arrays holding at most
+# BLOCK_ROWS copies, so memory stays the same however many planets and
+# samples there are, and the blocks are spread across worker processes that
+# each load the models once. Every block has its own random stream spawned
+# from a single seed, so the probabilities come out the same whatever the
+# number of processes.
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import catalog
+import exoplanets
+import instrument
+import matrix
+import models
+
+# perturbed copies drawn of each planet
+SAMPLES = 1000
+
+# the most perturbed copies drawn and scored at once
+BLOCK_ROWS = 1000000
+
+# the standard deviation of each feature in matrix.FEATURES, as a fraction
+# of its value for those drawn from a log-normal so they stay positive, or
+# in the feature's units otherwise. The catalogs don't give uncertainties
+# for the star attributes, so these are typical ones for exoplanet hosts.
+RELATIVE = {'S. Mass (SU)': .1, 'S. Radius (SU)': .1, 'S. Teff (K)': .02,
+            'S. Luminosity (SU)': .2, 'S. Age (Gyrs)': .5,
+            'S. Size from Planet (deg)': .1}
+ABSOLUTE = {'S. [Fe/H]': .1, 'S. Mag from Planet': .2}
+
+# columns copied over to the output so each planet's probabilities can be
+# matched up with it
+IDS = ['P. Name', 'P. Name KOI']
+
+
+def spreads(features=matrix.FEATURES):
+    """
+    Return the log-normal and normal standard deviations of the given
+    features, as two float32 arrays with zeros for features drawn the other
+    way.
+    """
+    relative = np.array([RELATIVE.get(name, 0) for name in features],
+                        dtype=np.float32)
+    absolute = np.array([ABSOLUTE.get(name, 0) for name in features],
+                        dtype=np.float32)
+    return relative, absolute
+
+
+def perturb(X, samples, rng):
+    """
+    Return samples perturbed copies of the rows of the given feature array,
+    as a float32 array indexed by sample, row and feature.
+    """
+    relative, absolute = spreads()
+    noise = rng.standard_normal((samples,) + X.shape, dtype=np.float32)
+    # the log-normal features are scaled and the rest shifted in place, so
+    # only the noise and the copies are held
+    copies = np.exp(noise * relative, out=np.empty_like(noise))
+    copies *= X
+    noise *= absolute
+    copies += noise
+    return copies
+
+
+def count(bundle, copies):
+    """
+    Return how many of the given perturbed copies of each row the bundle's
+    model puts in each of its classes, as an array indexed by row and class.
+    """
+    samples, rows, width = copies.shape
+    model = bundle['model']
+    predicted = model.predict(copies.reshape(-1, width))
+    codes = np.searchsorted(model.classes_, predicted).reshape(samples, rows)
+    index = np.arange(rows) * len(model.classes_) + codes
+    return np.bincount(index.ravel(), minlength=rows * len(model.classes_)) \
+        .reshape(rows, len(model.classes_))
+
+
+# the bundles the blocks are scored with, set once in each worker process
+_bundles = dict()
+
+
+def _load_bundles(targets):
+    """
+    Load the saved bundles for the given targets in this process.
+    """
+    _bundles.update({target: models.load(target) for target in targets})
+
+
+def _block(X, samples, seed):
+    """
+    Return how many of samples perturbed copies of each row of the given
+    feature array each loaded bundle puts in each class, as a dict from
+    each target to its model's classes and an array indexed by row and
+    class. The copies are drawn from the given seed sequence.
+    """
+    rng = np.random.default_rng(seed)
+    with instrument.span('block', rows=len(X), samples=samples):
+        copies = perturb(X, samples, rng)
+        return {target: (bundle['model'].classes_, count(bundle, copies))
+                for target, bundle in _bundles.items()}
+
+
+def propagate(X, targets=matrix.TARGETS, samples=SAMPLES, seed=0, jobs=1,
+              block_rows=BLOCK_ROWS):
+    """
+    Return the share of samples perturbed copies of each row of the given
+    feature array that the saved model for each target puts in each class,
+    as a dict from each target to the model's classes and an array indexed
+    by row and class, in the order of those classes. The rows are split
+    into blocks of at most block_rows copies, which are fanned out across
+    the given number of processes.
+    """
+    step = max(1, block_rows // samples)
+    starts = range(0, len(X), step)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    blocks = [(X[start:start + step], samples, s)
+              for start, s in zip(starts, seeds)]
+    if not blocks:
+        # nothing to score, but the classes still come from the models
+        _load_bundles(targets)
+        shares = dict()
+        for target in targets:
+            labels = _bundles[target]['model'].classes_
+            shares[target] = (labels, np.empty((0, len(labels))))
+        return shares
+    classes = dict()
+    counts = {target: list() for target in targets}
+
+    def gather(results):
+        for result in results:
+            for target in targets:
+                classes[target], block = result[target]
+                counts[target].append(block)
+
+    if jobs == 1:
+        _load_bundles(targets)
+        gather(_block(*block) for block in blocks)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_load_bundles,
+                                 initargs=(targets,)) as pool:
+            gather(pool.map(_block, *zip(*blocks)))
+    return {target: (classes[target],
+                     np.concatenate(counts[target]) / samples)
+            for target in targets}
+
+
+def probabilities(data, samples=SAMPLES, seed=0, jobs=1,
+                  block_rows=BLOCK_ROWS):
+    """
+    Return the IDS columns of the given catalog frame along with how likely
+    each planet is to be in each class of each target, from propagate, in a
+    column named after the target and class. Planets missing a feature are
+    left without probabilities.
+    """
+    ids = [name for name in IDS if name in data.columns]
+    result = data[ids].copy()
+    X, known = matrix.extract(data)
+    shares = propagate(X[known], samples=samples, seed=seed, jobs=jobs,
+                       block_rows=block_rows)
+    for target in matrix.TARGETS:
+        classes, share = shares[target]
+        for i, label in enumerate(classes):
+            column = '%s %s Probability' % (target, label)
+            result[column] = np.nan
+            result.loc[known, column] = share[:, i]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Work out how likely each '
+                                     'planet is to be in each habitability '
+                                     'class given the uncertainty in its '
+                                     'star\'s attributes')
+    parser.add_argument('catalog', nargs='?',
+                        default='phl_hec_all_kepler.csv',
+                        help='catalog csv to score')
+    parser.add_argument('-o', '--output',
+                        help='csv to write the probabilities to, the catalog '
+                        'name with _probabilities on the end by default')
+    parser.add_argument('--samples', type=int, default=SAMPLES,
+                        help='perturbed copies drawn of each planet')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-j', '--jobs', type=exoplanets.positive,
+                        default=os.cpu_count(),
+                        help='number of processes to score with, every core '
+                        'by default')
+    parser.add_argument('--block-rows', type=int, default=BLOCK_ROWS,
+                        help='most perturbed copies drawn and scored at once')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+
+    output = args.output or \
+        os.path.splitext(args.catalog)[0] + '_probabilities.csv'
+    header = pd.read_csv(args.catalog, nrows=0).columns
+    data = catalog.load(args.catalog, [name for name in IDS
+                                       if name in header] + matrix.FEATURES)
+    start = time.perf_counter()
+    result = probabilities(data, args.samples, args.seed, args.jobs,
+                           args.block_rows)
+    seconds = time.perf_counter() - start
+    result.to_csv(output, index=False)
+    print('drew %d samples of %d planets in %.2f seconds (%.0f samples/'
+          'second), saved to %s' % (args.samples, len(data), seconds,
+                                    args.samples * len(data) / seconds,
+                                    output))
+    instrument.finish(args)
+
+
+if __name__ == '__main__':
+    main()
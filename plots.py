@@ -0,0 +1,215 @@
+# Draws plots from declarative specs. Each Spec says what to plot, from which
+# frame, how big and with what labels, and the renderer draws a batch of them
+# in one pass. Figures are drawn headlessly straight onto Agg canvases rather
+# than through pyplot, and a figure is reused for the next spec of the same
+# size rather than being torn down and made again. Figures are saved by a
+# writer.Writer, which encodes and writes them in the background while the
+# next spec is drawn, so flush or close must be called before the files are
+# relied on.
+from dataclasses import dataclass
+
+import pandas as pd
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import density
+import instrument
+import swarm
+import writer
+
+
+@dataclass(frozen=True)
+class Spec:
+    """
+    A single plot saved to output. kind is one of 'swarm', 'bar', 'scatter'
+    or 'density', and frames names the frames it is drawn from, each onto its
+    own axes stacked top to bottom. filters is a tuple of (column, low, high)
+    windows that rows must fall strictly inside to be plotted, where either
+    bound may be None. clip names columns whose outliers, the rows outside
+    the masks render is given for them, are left out. fonts gives the title,
+    label and tick font sizes.
+    Density plots, and scatterplots of more than density.POINT_BUDGET
+    points, are drawn as an image with bins pixels along each side, shaded
+    by log scaled counts if log is True and colored by the most common hue
+    in each pixel, or by a blend of every hue with blend.
+    """
+    output: str
+    kind: str
+    frames: tuple
+    x: str
+    y: str
+    title: str = None
+    figsize: tuple = (5, 5)
+    order: tuple = None
+    hue: str = None
+    filters: tuple = ()
+    clip: tuple = ()
+    size: float = 3
+    rotation: float = 0
+    fonts: tuple = None
+    xlabel: str = None
+    ylabel: str = None
+    tight: bool = True
+    bins: int = density.BINS
+    log: bool = True
+    blend: bool = False
+
+    @property
+    def columns(self):
+        """
+        The columns this plot reads.
+        """
+        columns = [self.x, self.y] + [c for c, _, _ in self.filters] + \
+            list(self.clip)
+        if self.hue is not None:
+            columns.append(self.hue)
+        return list(dict.fromkeys(columns))
+
+
+# figures that have already been made, by their size and number of axes
+_figures = dict()
+
+# the writer figures are saved with, made when the first one is saved unless
+# configure has set one up
+_writer = None
+
+
+def configure(formats=('png',), compress_level=writer.COMPRESS_LEVEL,
+              pdf=None):
+    """
+    Save figures from now on in the given formats, compressing PNGs at the
+    given level, and as pages of the PDF at the given path if there is one,
+    closing the writer used until now.
+    """
+    global _writer
+    close()
+    _writer = writer.Writer(formats, compress_level, pdf)
+
+
+def output():
+    """
+    Return the writer figures are saved with.
+    """
+    global _writer
+    if _writer is None:
+        _writer = writer.Writer()
+    return _writer
+
+
+def flush():
+    """
+    Wait for every figure saved so far to be written, returning the records
+    of the files written since the last flush as in writer.Writer.flush.
+    """
+    return output().flush()
+
+
+def close():
+    """
+    Wait for every figure saved so far to be written and finish the PDF of
+    them if there is one, returning the records of the files written since
+    the last flush. The next figure saved starts a new writer.
+    """
+    global _writer
+    if _writer is None:
+        return []
+    records, _writer = _writer.close(), None
+    return records
+
+
+def _figure(figsize, rows):
+    """
+    Return a figure of the given size with the given number of axes stacked
+    on top of each other, along with its axes, cleared and ready to draw on.
+    """
+    key = (tuple(figsize), rows)
+    if not _figures:
+        # seaborn's look, set once a plot is actually drawn rather than
+        # whenever this module is imported
+        sns.set()
+    if key not in _figures:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(rows, squeeze=False)[:, 0]
+        _figures[key] = fig, list(axes)
+    fig, axes = _figures[key]
+    # drop anything a previous plot added, like a colorbar
+    for extra in fig.axes:
+        if extra not in axes:
+            extra.remove()
+    for ax in axes:
+        ax.clear()
+    return fig, axes
+
+
+def select(frame, spec, masks=None):
+    """
+    Return the rows of the given frame that fall inside the filters of the
+    given spec and inside the given masks of the columns it clips. The masks
+    are indexed by the frame's index.
+    """
+    for column in spec.clip:
+        frame = frame[masks[column][frame.index]]
+    for column, low, high in spec.filters:
+        if low is not None:
+            frame = frame[frame[column] > low]
+        if high is not None:
+            frame = frame[frame[column] < high]
+    return frame
+
+
+def draw(spec, frame, ax, masks=None):
+    """
+    Draw the given spec from the given frame onto the given axes, clipped by
+    the given masks as in select.
+    """
+    frame = select(frame, spec, masks)
+    order = list(spec.order) if spec.order is not None else None
+    if spec.kind == 'swarm':
+        swarm.swarmplot(x=spec.x, y=spec.y, data=frame, order=order,
+                        size=spec.size, ax=ax)
+    elif spec.kind == 'bar':
+        sns.barplot(x=spec.x, y=spec.y, data=frame, order=order, color='b',
+                    ax=ax)
+    elif spec.kind in ('scatter', 'density'):
+        # only give the classes actually in the frame a color
+        hues = None
+        if spec.hue is not None:
+            hues = list(pd.unique(frame[spec.hue].dropna()))
+        if spec.kind == 'density' or len(frame) > density.POINT_BUDGET:
+            density.densityplot(x=spec.x, y=spec.y, data=frame, hue=spec.hue,
+                                hue_order=hues, bins=spec.bins, log=spec.log,
+                                blend=spec.blend, ax=ax)
+        else:
+            sns.scatterplot(x=spec.x, y=spec.y, hue=spec.hue,
+                            hue_order=hues, data=frame, ax=ax)
+    else:
+        raise ValueError('unknown kind of plot %r' % spec.kind)
+
+    title, label, ticks = spec.fonts or (None, None, None)
+    if spec.title is not None:
+        ax.set_title(spec.title, fontsize=title)
+    ax.set_xlabel(spec.xlabel or spec.x, fontsize=label)
+    ax.set_ylabel(spec.ylabel or spec.y, fontsize=label)
+    ax.tick_params(axis='x', labelrotation=spec.rotation)
+    if ticks is not None:
+        ax.tick_params(labelsize=ticks)
+
+
+def render(specs, frames, masks=None):
+    """
+    Draw and save each of the given specs from the given dict of frames,
+    reusing one figure for every spec of the same size. Specs that clip
+    outliers are clipped by the given dict of masks, such as a Dataset's,
+    whose frames they must come from. The files are written in the
+    background, so they are only all there once flush has returned.
+    """
+    for spec in specs:
+        with instrument.span('plot', output=spec.output):
+            fig, axes = _figure(spec.figsize, len(spec.frames))
+            with instrument.span('draw'):
+                for ax, name in zip(axes, spec.frames):
+                    draw(spec, frames[name], ax, masks)
+            with instrument.span('savefig'):
+                output().save(fig, spec.output, spec.tight)
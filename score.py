@@ -0,0 +1,93 @@
+# Scores a catalog of candidate planets with the saved habitability models
+# without reading the whole catalog into memory. The catalog is read a fixed
+# number of rows at a time, only the columns the models need are parsed, and
+# the predictions for each chunk are appended to the output csv before the
+# next chunk is read, so memory stays the same however big the catalog is.
+import argparse
+import os
+import time
+
+import pandas as pd
+
+import catalog
+import instrument
+import matrix
+import models
+
+# rows read and scored at a time
+CHUNK_SIZE = 100000
+
+# columns copied over to the output so each prediction can be matched up
+# with its planet
+IDS = ['P. Name', 'P. Name KOI']
+
+
+def score_chunk(bundles, chunk, ids):
+    """
+    Return the given id columns of the chunk along with each model's
+    prediction and how likely it is. Rows missing a feature are left without
+    a prediction.
+    """
+    scored = chunk[ids].copy()
+    X, known = matrix.extract(chunk)
+    for target, bundle in bundles.items():
+        # object columns so the missing predictions don't turn the labels
+        # into floats
+        scored[target] = pd.Series(pd.NA, index=chunk.index, dtype=object)
+        scored[target + ' Probability'] = float('nan')
+        if known.any():
+            labels, proba = models.predict_proba(bundle, X[known])
+            scored.loc[known, target] = labels
+            scored.loc[known, target + ' Probability'] = proba
+    return scored
+
+
+def stream(path, output, bundles, size=CHUNK_SIZE):
+    """
+    Score the catalog csv at the given path with the given bundles, a dict
+    from each target to its saved bundle, writing the predictions to the
+    output csv a chunk of the given size at a time. Returns the number of
+    rows scored.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    ids = [name for name in IDS if name in header]
+    rows = 0
+    with open(output, 'w', newline='') as f:
+        chunks = catalog.read_chunks(path, ids + matrix.FEATURES, size)
+        for i, chunk in enumerate(chunks):
+            with instrument.span('chunk', rows=len(chunk)):
+                score_chunk(bundles, chunk, ids).to_csv(f, header=i == 0,
+                                                        index=False)
+            rows += len(chunk)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a catalog with the '
+                                     'saved habitability models a chunk at '
+                                     'a time')
+    parser.add_argument('catalog', nargs='?',
+                        default='phl_hec_all_kepler.csv',
+                        help='catalog csv to score')
+    parser.add_argument('-o', '--output',
+                        help='csv to write the predictions to, the catalog '
+                        'name with _scores on the end by default')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help='rows to read and score at a time')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+
+    output = args.output or \
+        os.path.splitext(args.catalog)[0] + '_scores.csv'
+    bundles = {target: models.load(target) for target in matrix.TARGETS}
+    start = time.perf_counter()
+    rows = stream(args.catalog, output, bundles, args.chunk_size)
+    seconds = time.perf_counter() - start
+    print('scored %d rows in %.2f seconds (%.0f rows/second), saved to %s' %
+          (rows, seconds, rows / seconds, output))
+    instrument.finish(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+# Serves the saved habitability models over HTTP so other tools can ask for
+# predictions without running the whole pipeline. The models are loaded once
+# when the server starts. Every request is handled on its own thread, but
+# rather than each thread running the models on its own handful of stars,
+# requests that arrive close together are queued up and scored together in
+# one predict call per model, which costs about the same as scoring a single
+# star.
+#
+# POST /predict with a json object of the eight star features, or a list of
+# them, and get back a list holding each model's prediction and how likely
+# it is for each star.
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import instrument
+import matrix
+import models
+
+# the most stars scored in one predict call
+MAX_BATCH = 256
+
+# the longest in seconds a request waits for others to be batched with
+MAX_WAIT = .002
+
+# the largest feature value the models' float32 features can hold
+LARGEST = float(np.finfo(np.float32).max)
+
+
+class Batcher:
+    """
+    Scores the stars handed to it in batches on a background thread.
+    """
+
+    def __init__(self, bundles, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        """
+        Start scoring with the given bundles, a dict from each target to its
+        saved bundle, batching up to max_batch stars and waiting at most
+        max_wait seconds for a batch to fill.
+        """
+        self.bundles = bundles
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, stars):
+        """
+        Queue the given list of stars, each a dict of their features, to be
+        scored. Returns a future for the list of their predictions.
+        """
+        future = Future()
+        self._queue.put((stars, future))
+        return future
+
+    def _collect(self):
+        """
+        Wait for a request, then gather more until the batch is full or it
+        has waited long enough. Returns the requests gathered.
+        """
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+            size += len(pending[-1][0])
+        return pending
+
+    def _run(self):
+        """
+        Score batches of requests for as long as the server runs.
+        """
+        while True:
+            pending = self._collect()
+            try:
+                results = self.score([s for stars, _ in pending
+                                      for s in stars])
+            except Exception:
+                # score each request on its own, so one bad request only
+                # fails itself rather than everything batched with it
+                for stars, future in pending:
+                    try:
+                        future.set_result(self.score(stars))
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            finally:
+                self.batches += 1
+                # the server runs until it is stopped, so don't keep the
+                # span of every batch it has scored
+                instrument.clear()
+            start = 0
+            for stars, future in pending:
+                future.set_result(results[start:start + len(stars)])
+                start += len(stars)
+
+    def score(self, stars):
+        """
+        Return each model's prediction and its probability for every one of
+        the given stars, scoring them all in one call per model.
+        """
+        X = np.array([[star[name] for name in matrix.FEATURES]
+                      for star in stars], dtype=np.float32)
+        results = [dict() for _ in stars]
+        for target, bundle in self.bundles.items():
+            labels, proba = models.predict_proba(bundle, X)
+            for result, label, p in zip(results, labels, proba):
+                # json can't hold NumPy types
+                result[target] = label.item() \
+                    if isinstance(label, np.generic) else label
+                result[target + ' Probability'] = float(p)
+        return results
+
+
+def _in_range(value):
+    """
+    Return whether the given number is finite and small enough to be held
+    as a float32.
+    """
+    try:
+        value = float(value)
+    except OverflowError:
+        # ints too big for a float
+        return False
+    return bool(np.isfinite(value)) and abs(value) <= LARGEST
+
+
+def check(stars):
+    """
+    Return the given request body as a list of stars, raising a ValueError
+    if it isn't a star or list of stars with every feature given as a
+    finite number a float32 can hold.
+    """
+    if isinstance(stars, dict):
+        stars = [stars]
+    if not isinstance(stars, list) or not stars:
+        raise ValueError('expected a star or a list of stars')
+    for star in stars:
+        if not isinstance(star, dict):
+            raise ValueError('expected each star to be an object')
+        missing = [name for name in matrix.FEATURES
+                   if not isinstance(star.get(name), (int, float)) or
+                   isinstance(star.get(name), bool)]
+        if missing:
+            raise ValueError('missing or non-numeric features: ' +
+                             ', '.join(missing))
+        # json allows NaN and Infinity, and ints of any size
+        invalid = [name for name in matrix.FEATURES
+                   if not _in_range(star[name])]
+        if invalid:
+            raise ValueError('features out of range: ' + ', '.join(invalid))
+    return stars
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers prediction requests with the server's batcher.
+    """
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self.reply(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            stars = check(json.loads(self.rfile.read(length)))
+        except ValueError as e:
+            self.reply(400, {'error': str(e)})
+            return
+        try:
+            results = self.server.batcher.submit(stars).result()
+        except Exception as e:
+            self.reply(500, {'error': 'scoring failed: %s' % e})
+            return
+        self.reply(200, results)
+
+    def reply(self, status, body):
+        """
+        Send the given status and json body.
+        """
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # logging every request slows the server down under load
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    """
+    A server handling each request on its own thread, with room for
+    connections from many clients at once to wait to be accepted.
+    """
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def serve(host, port, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+    """
+    Return a server on the given host and port that scores requests with
+    the saved models, batched as in Batcher.
+    """
+    bundles = {target: models.load(target) for target in matrix.TARGETS}
+    server = Server((host, port), Handler)
+    server.batcher = Batcher(bundles, max_batch, max_wait)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the saved '
+                                     'habitability models over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8163)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH,
+                        help='most stars scored in one predict call')
+    parser.add_argument('--max-wait', type=float, default=MAX_WAIT * 1000,
+                        help='longest a request waits to be batched, in ms')
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.max_batch,
+                   args.max_wait / 1000)
+    print('serving on http://%s:%d/predict' % server.server_address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
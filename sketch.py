@@ -0,0 +1,186 @@
+# Summaries of a column that can be built a chunk at a time and merged, so
+# statistics over a catalog too big to hold in memory can be worked out by
+# summarizing each chunk and merging the summaries. Counts, sums, minimums
+# and maximums merge exactly. Quantiles are kept in a sketch that counts the
+# values falling into buckets whose width grows with their distance from
+# zero, so any quantile is known to within a fixed relative error using a
+# number of buckets that depends on the range of the values rather than how
+# many there are.
+import math
+
+import numpy as np
+
+# the most a quantile from a sketch can be off by, relative to the value
+RELATIVE_ERROR = .01
+
+# values closer to zero than this are counted as zero
+SMALLEST = 1e-9
+
+# the most buckets a sketch keeps on each side of zero, the buckets nearest
+# zero are folded together once there are more
+MAX_BUCKETS = 2048
+
+
+class QuantileSketch:
+    """
+    Counts of values in logarithmically sized buckets, which give any
+    quantile to within relative_error of the exact value.
+    """
+
+    def __init__(self, relative_error=RELATIVE_ERROR):
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.count = 0
+        self.zeros = 0
+        # bucket index to count, for positive values and the magnitude of
+        # negative values
+        self.positive = dict()
+        self.negative = dict()
+
+    def _bucket(self, magnitudes):
+        """
+        Return the bucket each of the given positive values falls into.
+        """
+        return np.ceil(np.log(magnitudes) / math.log(self.gamma)).astype(
+            np.int64)
+
+    def _value(self, bucket):
+        """
+        Return the value a bucket stands for, which is within the relative
+        error of every value in it.
+        """
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    @staticmethod
+    def _add(store, buckets, counts):
+        for bucket, count in zip(buckets.tolist(), counts.tolist()):
+            store[bucket] = store.get(bucket, 0) + count
+        if len(store) > MAX_BUCKETS:
+            # fold the buckets nearest zero into the smallest one kept
+            keys = sorted(store)
+            folded = sum(store.pop(k) for k in keys[:-MAX_BUCKETS])
+            store[keys[-MAX_BUCKETS]] += folded
+
+    def update(self, values):
+        """
+        Add the given array of values, ignoring any that are missing.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        small = np.abs(values) < SMALLEST
+        self.zeros += int(np.count_nonzero(small))
+        for store, side in [(self.positive, values[~small & (values > 0)]),
+                            (self.negative, -values[~small & (values < 0)])]:
+            if len(side):
+                buckets, counts = np.unique(self._bucket(side),
+                                            return_counts=True)
+                self._add(store, buckets, counts)
+        self.count += len(values)
+
+    def merge(self, other):
+        """
+        Add the counts of another sketch with the same relative error.
+        """
+        if other.relative_error != self.relative_error:
+            raise ValueError('can only merge sketches with the same '
+                             'relative error')
+        for store, more in [(self.positive, other.positive),
+                            (self.negative, other.negative)]:
+            self._add(store, np.array(list(more), dtype=np.int64),
+                      np.array(list(more.values()), dtype=np.int64))
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        """
+        Return the q-th quantile of the values added, within the relative
+        error of the value NumPy's quantile gives with method='lower', or NaN
+        if no values have been added.
+        """
+        if self.count == 0:
+            return math.nan
+        rank = int(q * (self.count - 1))
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -self._value(bucket)
+        seen += self.zeros
+        if seen > rank:
+            return 0.
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return self._value(bucket)
+        return self._value(max(self.positive))
+
+    def histogram(self):
+        """
+        Return the edges of every bucket holding a value and the number of
+        values in each, smallest first. Zeros get a bucket of their own from
+        -SMALLEST to SMALLEST.
+        """
+        edges, counts = list(), list()
+        for bucket in sorted(self.negative, reverse=True):
+            edges.append((-self.gamma ** bucket, -self.gamma ** (bucket - 1)))
+            counts.append(self.negative[bucket])
+        if self.zeros:
+            edges.append((-SMALLEST, SMALLEST))
+            counts.append(self.zeros)
+        for bucket in sorted(self.positive):
+            edges.append((self.gamma ** (bucket - 1), self.gamma ** bucket))
+            counts.append(self.positive[bucket])
+        return edges, counts
+
+
+class Summary:
+    """
+    The count, number missing, sum, minimum, maximum and quantile sketch of
+    a column.
+    """
+
+    def __init__(self, relative_error=RELATIVE_ERROR):
+        self.count = 0
+        self.missing = 0
+        self.sum = 0.
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(relative_error)
+
+    def update(self, values):
+        """
+        Add the given array of values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        known = values[~np.isnan(values)]
+        self.missing += len(values) - len(known)
+        if len(known):
+            self.count += len(known)
+            self.sum += float(known.sum())
+            self.min = min(self.min, float(known.min()))
+            self.max = max(self.max, float(known.max()))
+            self.sketch.update(known)
+
+    def merge(self, other):
+        """
+        Add another summary of the same column to this one.
+        """
+        self.count += other.count
+        self.missing += other.missing
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def quantile(self, q):
+        """
+        Return the q-th quantile as in QuantileSketch.quantile, kept within
+        the smallest and largest values.
+        """
+        if self.count == 0:
+            return math.nan
+        return min(max(self.sketch.quantile(q), self.min), self.max)
@@ -0,0 +1,206 @@
+# Finds host stars by where they are in the sky. The position of every star
+# is turned into a point on the unit sphere and put into a KD-tree, so stars
+# within some angle of a point, inside a box of right ascension and
+# declination or nearest to a point are found by walking the tree rather
+# than checking every star. Queries return the positions of the matching
+# rows in the catalog the index was built from, which can be used to pick
+# those rows out for plotting or scoring.
+import argparse
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import catalog
+
+RA = 'S. RA (hrs)'
+DEC = 'S. DEC (deg)'
+
+# the circle of sky Kepler watched, as its center's right ascension in hours
+# and declination in degrees and its radius in degrees
+KEPLER_FIELD = (19.378, 44.5, 8.5)
+
+
+def unit_vectors(ra, dec):
+    """
+    Return the points on the unit sphere for the given right ascensions in
+    hours and declinations in degrees, as an array with a row per point.
+    """
+    ra = np.radians(np.asarray(ra, dtype=np.float64) * 15)
+    dec = np.radians(np.asarray(dec, dtype=np.float64))
+    return np.column_stack([np.cos(dec) * np.cos(ra),
+                            np.cos(dec) * np.sin(ra), np.sin(dec)])
+
+
+def chord(degrees):
+    """
+    Return the straight line distance between two points on the unit sphere
+    the given angle apart.
+    """
+    return 2 * np.sin(np.radians(degrees) / 2)
+
+
+def angle(chords):
+    """
+    Return the angle in degrees between two points on the unit sphere the
+    given straight line distance apart.
+    """
+    return np.degrees(2 * np.arcsin(np.clip(chords / 2, 0, 1)))
+
+
+class SkyIndex:
+    """
+    A KD-tree over the sky positions of the stars of a catalog.
+    """
+
+    def __init__(self, ra, dec):
+        """
+        Index the stars at the given right ascensions in hours and
+        declinations in degrees. Stars with no position are left out.
+        """
+        ra = np.asarray(ra, dtype=np.float64)
+        dec = np.asarray(dec, dtype=np.float64)
+        self.rows = np.flatnonzero(~np.isnan(ra) & ~np.isnan(dec))
+        self.ra = ra[self.rows]
+        self.dec = dec[self.rows]
+        self.tree = cKDTree(unit_vectors(self.ra, self.dec))
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        Index the stars of the given catalog frame.
+        """
+        return cls(data[RA].to_numpy(), data[DEC].to_numpy())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def cone(self, ra, dec, radius):
+        """
+        Return the rows of the stars within the given radius in degrees of
+        the given right ascension in hours and declination in degrees, in
+        row order.
+        """
+        center = unit_vectors([ra], [dec])[0]
+        found = self.tree.query_ball_point(center, chord(radius))
+        return np.sort(self.rows[found])
+
+    def box(self, ra_low, ra_high, dec_low, dec_high):
+        """
+        Return the rows of the stars with right ascension between the given
+        hours and declination between the given degrees, in row order. The
+        right ascension range wraps around 24 hours if ra_low is bigger than
+        ra_high, and covers every right ascension if ra_high is 24 or more
+        hours past ra_low.
+        """
+        # a whole turn or more would wrap around to nothing
+        width = 24 if ra_high - ra_low >= 24 else (ra_high - ra_low) % 24
+        # search the circle around the box, then keep what is inside it
+        ra = (ra_low + width / 2) % 24
+        corners = unit_vectors([ra_low, ra_low, ra_high, ra_high],
+                               [dec_low, dec_high, dec_low, dec_high])
+        middle = (dec_low + dec_high) / 2
+        center = unit_vectors([ra], [middle])[0]
+        if width > 12:
+            found = np.arange(len(self))
+        else:
+            # the farthest point of the box from its center is a corner or
+            # the middle of its top or bottom edge
+            reach = np.linalg.norm(corners - center, axis=1).max()
+            found = np.asarray(self.tree.query_ball_point(
+                center, max(reach, chord(abs(dec_high - middle)))),
+                dtype=np.int64)
+        inside = ((self.ra[found] - ra_low) % 24 <= width) & \
+            (self.dec[found] >= dec_low) & (self.dec[found] <= dec_high)
+        return np.sort(self.rows[found[inside]])
+
+    def nearest(self, ra, dec, k=1):
+        """
+        Return the rows of the k stars nearest the given right ascension in
+        hours and declination in degrees, nearest first, along with how far
+        away each one is in degrees.
+        """
+        k = min(k, len(self))
+        chords, found = self.tree.query(unit_vectors([ra], [dec])[0], k)
+        return self.rows[np.atleast_1d(found)], angle(np.atleast_1d(chords))
+
+
+def check(index, ra, dec, queries, rng):
+    """
+    Raise an AssertionError if the given number of random cones and boxes,
+    along with ones wrapping around 24 hours and covering the whole sky,
+    don't find the same stars in the given index of the given positions as
+    checking every star does.
+    """
+    points = unit_vectors(ra, dec)
+    boxes = [(0, 24, -90, 90), (-6, 30, -90, 90), (23, 1, -30, 30),
+             (12, 12, -90, 90)]
+    for _ in range(queries):
+        low, high = np.sort(rng.uniform(-90, 90, 2))
+        boxes.append((rng.uniform(0, 24), rng.uniform(0, 24), low, high))
+        center = rng.integers(len(ra))
+        radius = rng.uniform(0, 10)
+        expected = np.flatnonzero(angle(np.linalg.norm(
+            points - points[center], axis=1)) <= radius)
+        assert np.array_equal(index.cone(ra[center], dec[center], radius),
+                              expected), (ra[center], dec[center], radius)
+    for ra_low, ra_high, dec_low, dec_high in boxes:
+        width = 24 if ra_high - ra_low >= 24 else (ra_high - ra_low) % 24
+        expected = np.flatnonzero(((ra - ra_low) % 24 <= width) &
+                                  (dec >= dec_low) & (dec <= dec_high))
+        assert np.array_equal(
+            index.box(ra_low, ra_high, dec_low, dec_high), expected), \
+            (ra_low, ra_high, dec_low, dec_high)
+
+
+def footprint(data, field=KEPLER_FIELD):
+    """
+    Return the rows of the given catalog frame inside the given circle of
+    sky, by default the Kepler field.
+    """
+    return data.iloc[SkyIndex.from_frame(data).cone(*field)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time queries on the sky '
+                                     'index of a catalog')
+    parser.add_argument('catalog', nargs='?',
+                        default='phl_hec_all_confirmed.csv')
+    parser.add_argument('--stars', type=int, default=1000000,
+                        help='stars to index, drawn from around the '
+                        'positions in the catalog')
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    data = catalog.load(args.catalog, [RA, DEC]).dropna()
+    rng = np.random.default_rng(0)
+    picked = rng.choice(len(data), args.stars)
+    ra = (data[RA].to_numpy()[picked] + rng.normal(0, .05, args.stars)) % 24
+    dec = np.clip(data[DEC].to_numpy()[picked] +
+                  rng.normal(0, .5, args.stars), -90, 90)
+
+    start = time.perf_counter()
+    index = SkyIndex(ra, dec)
+    print('indexed %d stars in %.3f seconds' %
+          (len(index), time.perf_counter() - start))
+    check(index, ra, dec, 20, rng)
+    print('cone and box queries match checking every star')
+
+    targets = rng.choice(len(index), args.queries)
+    queries = {
+        'cone 0.1 deg': lambda i: index.cone(ra[i], dec[i], .1),
+        'box 0.1 hrs x 1 deg': lambda i: index.box(
+            ra[i] - .05, ra[i] + .05, dec[i] - .5, dec[i] + .5),
+        '10 nearest': lambda i: index.nearest(ra[i], dec[i], 10)}
+    for name, query in queries.items():
+        found = 0
+        start = time.perf_counter()
+        for i in targets:
+            found += len(query(i)[0] if name == '10 nearest' else query(i))
+        seconds = (time.perf_counter() - start) / len(targets)
+        print('%-20s %8.3f ms per query, %8.1f stars per query' %
+              (name, seconds * 1000, found / len(targets)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# Splits the host star attributes out of a catalog into a table with a row
+# per star. The catalogs have a row per planet, so every attribute of a
+# star with several planets is repeated on each of their rows. The star
+# table holds each star once, keyed by its name, along with the position of
+# each planet's star in it, so work that only depends on the star can be
+# done once per star and the results handed back to the planets by indexing
+# with the planets' star positions.
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import catalog
+
+NAME = 'S. Name'
+
+# star columns that depend on the planet's orbit, how bright and big the
+# star looks from the planet, so they stay with the planets
+SEEN_FROM_PLANET = ['S. Mag from Planet', 'S. Size from Planet (deg)']
+
+
+def star_columns(columns):
+    """
+    Return the names of the given columns that are attributes of the host
+    star alone.
+    """
+    return [name for name in columns
+            if name.startswith('S. ') and name not in SEEN_FROM_PLANET]
+
+
+@dataclass(frozen=True)
+class StarTable:
+    """
+    The host stars of a catalog, with a row per star holding its attributes,
+    and the row in stars of each planet's star.
+    """
+    stars: pd.DataFrame
+    index: np.ndarray
+
+    def broadcast(self, values):
+        """
+        Return the given array with a value per star as an array with a value
+        per planet.
+        """
+        return np.asarray(values)[self.index]
+
+
+def build(data):
+    """
+    Return the star table of the given catalog frame. The attributes of each
+    star are taken from its first planet, and planets with no star name are
+    each given a star of their own.
+    """
+    columns = star_columns(data.columns)
+    if len(data) == 0:
+        return StarTable(data[columns].reset_index(drop=True),
+                         np.empty(0, dtype=np.int32))
+    # stars are numbered in the order their first planet appears
+    codes, _ = pd.factorize(data[NAME])
+    unnamed = codes < 0
+    codes[unnamed] = codes.max() + 1 + np.arange(np.count_nonzero(unnamed))
+    firsts = np.unique(codes, return_index=True)[1]
+    stars = data[columns].iloc[firsts]
+    return StarTable(stars.reset_index(drop=True), codes.astype(np.int32))
+
+
+def path(csv):
+    """
+    Return the file the planets' star positions for the catalog csv at the
+    given path are cached in.
+    """
+    return os.path.join(catalog.cache_dir(csv), 'stars.npz')
+
+
+def load(csv):
+    """
+    Return the star table of the catalog csv at the given path, loading the
+    planets' star positions from the cache when they have already been
+    worked out.
+    """
+    columns = star_columns(catalog.dtypes(csv))
+    target = path(csv)
+    if os.path.exists(target):
+        with np.load(target) as saved:
+            firsts, index = saved['firsts'], saved['index']
+        stars = catalog.load(csv, columns).iloc[firsts]
+        return StarTable(stars.reset_index(drop=True), index)
+
+    data = catalog.load(csv, columns)
+    table = build(data)
+    firsts = np.unique(table.index, return_index=True)[1]
+    with catalog.atomic_write(target) as f:
+        np.savez(f, firsts=firsts, index=table.index)
+    return table
+
+
+def conflicts(data, table):
+    """
+    Return the number of stars whose planets don't all give the same value
+    for some attribute of the star, which take their first planet's values.
+    """
+    differs = np.zeros(len(table.stars), dtype=bool)
+    for name in table.stars.columns:
+        mine = data[name].to_numpy()
+        theirs = table.broadcast(table.stars[name].to_numpy())
+        missing = pd.isna(mine) & pd.isna(theirs)
+        differs[table.index[~missing & (mine != theirs)]] = True
+    return int(np.count_nonzero(differs))
@@ -1,21 +1,125 @@
 # Creates swarmplots relating the habitability and habitable class of
 # confirmed exoplanets to different attributes of the stars they revolve
 # around. Also creates models for predicting the habitability and habitable
-# class of different Kepler objects based on said attirubtes.
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-
-from sklearn.model_selection import train_test_split
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.metrics import accuracy_score
-
-import time
-sns.set()
+# class of different Kepler objects based on said attirubtes. The models are
+# made by models.py, which is only imported once they are needed, so drawing
+# the plots doesn't pay for loading scikit-learn.
+import argparse
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+
+import aggregate
+import catalog
+import dataset
+import density
+import exoplanets
+import instrument
+import manifest
+import matrix
+import plots
+import swarm
+import writer
 
 planets = ['hypopsychroplanet', 'psychroplanet', 'mesoplanet',
            'thermoplanet']
 
+# the star attributes the models predict habitability from
+features = matrix.FEATURES
+
+
+# the two kinds of star attribute swarmplot, one of just the habitable planets
+# in class order and a much larger one of the non-habitable planets
+H = dict(kind='swarm', frames=('h',), x='P. Habitable Class', order=planets,
+         rotation=-15)
+NH = dict(kind='swarm', frames=('nh',), x='P. Habitable Class',
+          figsize=(20, 20), fonts=(30, 24, 16))
+
+# the plots drawn by each of the s_ functions below
+SPECS = {
+    'type': [
+        plots.Spec('s_type.png', 'bar', ('counts',), 'Type', 'habitable',
+                   'Nuber of Confirmed Habitable Exoplanets per Star Type',
+                   xlabel='Star Class',
+                   ylabel='Number of Confirmed Exoplanets'),
+        plots.Spec('s_type_all.png', 'bar', ('counts',), 'Type', 'total',
+                   'Nuber of Confirmed Exoplanets per Star Type',
+                   xlabel='Star Class',
+                   ylabel='Number of Confirmed Exoplanets')],
+    'mass': [
+        plots.Spec('s_mass_h.png', y='S. Mass (SU)',
+                   title='Distribution of Number of Habitable'
+                   ' Planets per Class vs Parent Star Mass', **H),
+        plots.Spec('s_mass_nh.png', y='S. Mass (SU)',
+                   title='Distribution of Number of Non-Habitable'
+                   ' Planets per Class vs Parent Star Mass',
+                   **dict(NH, figsize=(20, 8)))],
+    'radius': [
+        plots.Spec('s_radius_h.png', y='S. Radius (SU)',
+                   title='Distribution of Number of Habitable'
+                   ' Exoplanets per Class vs Parent Star Radius', **H),
+        plots.Spec('s_radius_nh.png', y='S. Radius (SU)',
+                   title='Distribution of Number of Non-Habitable'
+                   ' Exoplanets per Class vs Parent Star Radius',
+                   **dict(NH, figsize=(20, 8)))],
+    'mass_vs_radius': [
+        plots.Spec('s_mass_vs_radius_all.png', 'scatter', ('data',),
+                   'S. Mass (SU)', 'S. Radius (SU)',
+                   'Star Mass vs Star Radius for Stars with Known Exoplanets',
+                   hue='P. Habitable Class'),
+        plots.Spec('s_mass_vs_radius_h.png', 'scatter', ('h',),
+                   'S. Mass (SU)', 'S. Radius (SU)',
+                   'Star Mass vs Star Radius for Stars'
+                   ' with Known Habitable Exoplanets',
+                   hue='P. Habitable Class')],
+    'teff': [
+        plots.Spec('s_teff_h.png', y='S. Teff (K)',
+                   title='Distribution of Number of Habitable Exoplanets per'
+                   ' Class vs Parent Star Effective Temperature', **H),
+        plots.Spec('s_teff_nh.png', y='S. Teff (K)',
+                   title='Distribution of Number of Non-Habitable Exoplanets'
+                   ' per Class vs Parent Star Effective Temperature', **NH)],
+    'luminosity': [
+        plots.Spec('s_luminiosity_h.png', y='S. Luminosity (SU)',
+                   title='Distribution of Number of Habitable'
+                   ' Planets per Class vs Parent Star Luminosity', **H),
+        plots.Spec('s_luminiosity_nh.png', y='S. Luminosity (SU)',
+                   title='Distribution of Number of Non-Habitable'
+                   ' Planets per Class vs Parent Star Luminosity', **NH)],
+    'feh': [
+        plots.Spec('s_FeH_h.png', y='S. [Fe/H]',
+                   title='Distribution of Number of Habitable'
+                   ' Planets per Habitable Class vs Parent Star'
+                   ' Iron to Hydrogen Ratio', **H),
+        plots.Spec('s_FeH_nh.png', y='S. [Fe/H]',
+                   title='Distribution of Number of Non-Habitable'
+                   ' Planets per Class vs Parent Star Iron to Hydrogen Ratio',
+                   **NH)],
+    'age': [
+        plots.Spec('s_age_h.png', y='S. Age (Gyrs)',
+                   title='Distribution of Number of Habitable'
+                   ' Exoplanets per Class vs Age of Parent Star', **H),
+        plots.Spec('s_age_nh.png', y='S. Age (Gyrs)',
+                   title='Distribution of Number of Non-Habitable'
+                   ' Exoplanets per Class vs Age of Parent Star',
+                   **dict(NH, figsize=(10, 10), fonts=(20, 16, 12)))],
+    'mag': [
+        plots.Spec('s_mag_from_planet_h.png', y='S. Mag from Planet',
+                   title='Planet Habitability in Relation to Star Magnitude'
+                   ' from Planet', **H),
+        plots.Spec('s_mag_from_planet_nh.png', y='S. Mag from Planet',
+                   title='Planet Habitability in Relation to Star Magnitude'
+                   ' from Planet',
+                   **dict(NH, figsize=(10, 10), fonts=(24, 16, 12)))],
+    'size': [
+        plots.Spec('s_size_from_planet_h.png', y='S. Size from Planet (deg)',
+                   title='Planet Habitability in Relation to Star Size from'
+                   ' Planet', **H),
+        plots.Spec('s_size_from_planet_nh.png',
+                   y='S. Size from Planet (deg)',
+                   title='Planet Habitability in Relation to Star Size from'
+                   ' Planet', **NH)]
+}
+
 
 def s_type(data):
     """
@@ -23,46 +127,10 @@ def s_type(data):
     data. In order to avoid severely cluttered axes, only broad star types are
     included, the specific types are aggregated into general type categories
     """
-    # plot habitable planets
-    plt.cla()
-    # group the data by star letter classification
-    d = data[['S. Type', 'P. Habitable']].dropna()
-    types = list()
-    for star_type in d['S. Type']:
-        types.append(star_type[0])
-    d['Type'] = types
-    d = d.groupby('Type')['P. Habitable'].sum().reset_index(name='count')
-    # cast groupby object to a dataframe object
-    pd.DataFrame(d)
-    o = list(d['Type'])
-    # create a bar chart to show the data
-    sns.catplot(x='Type', y='count', kind='bar', ci=None, color='b',
-                data=d, order=o)
-    # configure the plot to make it legible
-    plt.title('Nuber of Confirmed Habitable Exoplanets per Star Type')
-    plt.xlabel('Star Class')
-    plt.ylabel('Number of Confirmed Exoplanets')
-    plt.savefig('s_type.png', bbox_inches='tight')
-    plt.close()
-
-    # plot all planets
-    plt.cla()
-    d2 = data[['S. Type']].dropna()
-    counts = dict()
-    for star_type in d2['S. Type']:
-        if star_type[0] in counts:
-            counts[star_type[0]] += 1
-        else:
-            counts[star_type[0]] = 1
-    counts_pd = pd.DataFrame(list(zip(counts.keys(), counts.values())),
-                             columns=['Type', 'Counts'])
-    sns.catplot(x='Type', y='Counts', kind='bar', ci=None, color='b',
-                data=counts_pd, order=o)
-    plt.title('Nuber of Confirmed Exoplanets per Star Type')
-    plt.xlabel('Star Class')
-    plt.ylabel('Number of Confirmed Exoplanets')
-    plt.savefig('s_type_all.png', bbox_inches='tight')
-    plt.close()
+    # count the habitable and total planets for each star letter classification
+    counts = aggregate.star_class_counts(data)
+    plots.render([replace(spec, order=tuple(counts['Type']))
+                  for spec in SPECS['type']], {'counts': counts})
 
 
 def s_mass(h, nh):
@@ -70,34 +138,7 @@ def s_mass(h, nh):
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     mass of their parent star.
     """
-    # plot with only habitable planets
-    plt.cla()
-    # create a swarmplot to plot the dsitribution
-    plt.subplots(figsize=(5, 5))
-    sns.swarmplot(x='P. Habitable Class', y='S. Mass (SU)',
-                  order=planets, size=3, data=h)
-    # configure the plot to make it legible
-    plt.xticks(rotation=-15)
-    plt.title('Distribution of Number of Habitable' +
-              ' Planets per Class vs Parent Star Mass')
-    plt.savefig('s_mass_h.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only non-habitable planets
-    plt.cla()
-    # create a swarmplot to plot the dsitribution
-    plt.subplots(figsize=(20, 8))
-    sns.swarmplot(x='P. Habitable Class', y='S. Mass (SU)',
-                  size=3, data=nh)
-    # configure the plot to make it legible
-    plt.title('Distribution of Number of Non-Habitable' +
-              ' Planets per Class vs Parent Star Mass', fontsize=30)
-    plt.xlabel('P. Habitable Class', fontsize=24)
-    plt.ylabel('S. Mass (SU)', fontsize=24)
-    plt.xticks(fontsize=16)
-    plt.yticks(fontsize=16)
-    plt.savefig('s_mass_nh.png', bbox_inches='tight')
-    plt.close()
+    plots.render(SPECS['mass'], {'h': h, 'nh': nh})
 
 
 def s_radius(h, nh):
@@ -105,34 +146,7 @@ def s_radius(h, nh):
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     radius of their parent star.
     """
-    # plot with only habitable planets
-    plt.cla()
-    # create a swarmplot to plot the distribution
-    plt.subplots(figsize=(5, 5))
-    sns.swarmplot(x='P. Habitable Class', y='S. Radius (SU)',
-                  order=planets, size=3, data=h)
-    # configure the plot to make it legible
-    plt.xticks(rotation=-15)
-    plt.title('Distribution of Number of Habitable' +
-              ' Exoplanets per Class vs Parent Star Radius')
-    plt.savefig('s_radius_h.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only non-habitable planets
-    plt.cla()
-    # create a swarmplot to plot the distribution
-    plt.subplots(figsize=(20, 8))
-    sns.swarmplot(x='P. Habitable Class', y='S. Radius (SU)',
-                  size=3, data=nh)
-    # configure the plot to make it legible
-    plt.title('Distribution of Number of Non-Habitable' +
-              ' Exoplanets per Class vs Parent Star Radius', fontsize=30)
-    plt.xlabel('P. Habitable Class', fontsize=24)
-    plt.ylabel('S. Radius (SU)', fontsize=24)
-    plt.xticks(fontsize=16)
-    plt.yticks(fontsize=16)
-    plt.savefig('s_radius_nh.png', bbox_inches='tight')
-    plt.close()
+    plots.render(SPECS['radius'], {'h': h, 'nh': nh})
 
 
 def s_mass_vs_radius(data, h):
@@ -141,27 +155,7 @@ def s_mass_vs_radius(data, h):
     and color code by exoplanet type. Because of how many planets are shown, a
     second plot is also made that includes only potentially habitable planets
     """
-    # plot with both habitable and non-habitable planets
-    plt.cla()
-    # create a scatter plot to compare each parent star's mass to its radius
-    plt.subplots(figsize=(20, 20))
-    sns.relplot(x='S. Mass (SU)', y='S. Radius (SU)',
-                hue='P. Habitable Class', data=data)
-    # configure the plot to make it legible
-    plt.title('Star Mass vs Star Radius for Stars with Known Exoplanets')
-    plt.savefig('s_mass_vs_radius_all.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only habitable planets
-    plt.cla()
-    plt.subplots(figsize=(20, 20))
-    sns.relplot(x='S. Mass (SU)', y='S. Radius (SU)',
-                hue='P. Habitable Class', data=h)
-    # configure the plot to make it legible
-    plt.title('Star Mass vs Star Radius for Stars' +
-              ' with Known Habitable Exoplanets')
-    plt.savefig('s_mass_vs_radius_h.png', bbox_inches='tight')
-    plt.close()
+    plots.render(SPECS['mass_vs_radius'], {'data': data, 'h': h})
 
 
 def s_teff(h, nh):
@@ -169,31 +163,7 @@ def s_teff(h, nh):
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     effective temperature of their parent star.
     """
-    # plot with only habitable planets
-    plt.cla()
-    plt.subplots(figsize=(5, 5))
-    sns.swarmplot(x='P. Habitable Class', y='S. Teff (K)',
-                  order=planets, size=3, data=h)
-    plt.xticks(rotation=-15)
-    plt.title('Distribution of Number of Habitable' +
-              ' Exoplanets per Class vs Parent Star Effective Temperature')
-    plt.savefig('s_teff_h.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only non-habitable planets
-    plt.cla()
-    plt.subplots(figsize=(20, 20))
-    sns.swarmplot(x='P. Habitable Class', y='S. Teff (K)',
-                  size=3, data=nh)
-    plt.title('Distribution of Number of Non-Habitable' +
-              ' Exoplanets per Class vs Parent Star Effective Temperature',
-              fontsize=30)
-    plt.xlabel('P. Habitable Class', fontsize=24)
-    plt.ylabel('S. Teff (K)', fontsize=24)
-    plt.xticks(fontsize=16)
-    plt.yticks(fontsize=16)
-    plt.savefig('s_teff_nh.png', bbox_inches='tight')
-    plt.close()
+    plots.render(SPECS['teff'], {'h': h, 'nh': nh})
 
 
 def s_luminosity(h, nh):
@@ -201,30 +171,7 @@ def s_luminosity(h, nh):
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     luminosity of their parent star.
     """
-    # plot with only habitable planets
-    plt.cla()
-    plt.subplots(figsize=(5, 5))
-    sns.swarmplot(x='P. Habitable Class', y='S. Luminosity (SU)',
-                  order=planets, size=3, data=h)
-    plt.xticks(rotation=-15)
-    plt.title('Distribution of Number of Habitable' +
-              ' Planets per Class vs Parent Star Luminosity')
-    plt.savefig('s_luminiosity_h.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only non-habitable planets
-    plt.cla()
-    plt.subplots(figsize=(20, 20))
-    sns.swarmplot(x='P. Habitable Class', y='S. Luminosity (SU)',
-                  size=3, data=nh)
-    plt.title('Distribution of Number of Non-Habitable' +
-              ' Planets per Class vs Parent Star Luminosity', fontsize=30)
-    plt.xlabel('P. Habitable Class', fontsize=24)
-    plt.ylabel('S. Luminosity (SU)', fontsize=24)
-    plt.xticks(fontsize=16)
-    plt.yticks(fontsize=16)
-    plt.savefig('s_luminiosity_nh.png', bbox_inches='tight')
-    plt.close()
+    plots.render(SPECS['luminosity'], {'h': h, 'nh': nh})
 
 
 def s_FeH(h, nh):
@@ -232,32 +179,7 @@ def s_FeH(h, nh):
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     ratio of iron to hydrogen in their parent star.
     """
-    # plot with only habitable planets
-    plt.cla()
-    plt.subplots(figsize=(5, 5))
-    sns.swarmplot(x='P. Habitable Class', y='S. [Fe/H]',
-                  order=planets, size=3, data=h)
-    plt.xticks(rotation=-15)
-    plt.title('Distribution of Number of Habitable' +
-              ' Planets per Habitable Class vs Parent Star' +
-              ' Iron to Hydrogen Ratio')
-    plt.savefig('s_FeH_h.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only non-habitable planets
-    plt.cla()
-    plt.subplots(figsize=(20, 20))
-    sns.swarmplot(x='P. Habitable Class', y='S. [Fe/H]',
-                  size=3, data=nh)
-    plt.title('Distribution of Number of Non-Habitable' +
-              ' Planets per Class vs Parent Star Iron to Hydrogen Ratio',
-              fontsize=30)
-    plt.xlabel('P. Habitable Class', fontsize=24)
-    plt.ylabel('S. [Fe/H]', fontsize=24)
-    plt.xticks(fontsize=16)
-    plt.yticks(fontsize=16)
-    plt.savefig('s_FeH_nh.png', bbox_inches='tight')
-    plt.close()
+    plots.render(SPECS['feh'], {'h': h, 'nh': nh})
 
 
 def s_age(h, nh):
@@ -265,30 +187,7 @@ def s_age(h, nh):
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     age of their parent star.
     """
-    # plot with only habitable planets
-    plt.cla()
-    plt.subplots(figsize=(5, 5))
-    sns.swarmplot(x='P. Habitable Class', y='S. Age (Gyrs)',
-                  order=planets, size=3, data=h)
-    plt.xticks(rotation=-15)
-    plt.title('Distribution of Number of Habitable' +
-              ' Exoplanets per Class vs Age of Parent Star')
-    plt.savefig('s_age_h.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only non-habitable planets
-    plt.cla()
-    plt.subplots(figsize=(10, 10))
-    sns.swarmplot(x='P. Habitable Class', y='S. Age (Gyrs)',
-                  size=3, data=nh)
-    plt.title('Distribution of Number of Non-Habitable' +
-              ' Exoplanets per Class vs Age of Parent Star', fontsize=20)
-    plt.xlabel('P. Habitable Class', fontsize=16)
-    plt.ylabel('S. Age (Gyrs)', fontsize=16)
-    plt.xticks(fontsize=12)
-    plt.yticks(fontsize=12)
-    plt.savefig('s_age_nh.png', bbox_inches='tight')
-    plt.close()
+    plots.render(SPECS['age'], {'h': h, 'nh': nh})
 
 
 def s_mag_from_planet(h, nh):
@@ -296,28 +195,7 @@ def s_mag_from_planet(h, nh):
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     magnitude of the parent star as seen by the plaent
     """
-    # plot with only habitable planets
-    plt.subplots(figsize=(5, 5))
-    sns.swarmplot(x='P. Habitable Class', y='S. Mag from Planet', data=h,
-                  order=planets, size=3)
-    plt.xticks(rotation=-15)
-    plt.title('Planet Habitability in Relation to Star Magnitude from Planet')
-    plt.savefig('s_mag_from_planet_h.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only non-habitable planets
-    plt.cla()
-    plt.subplots(figsize=(10, 10))
-    sns.swarmplot(x='P. Habitable Class', y='S. Mag from Planet', data=nh,
-                  size=3)
-    plt.title('Planet Habitability in Relation to Star Magnitude from Planet',
-              fontsize=24)
-    plt.xlabel('P. Habitable Class', fontsize=16)
-    plt.ylabel('S. Mag from Planet', fontsize=16)
-    plt.xticks(fontsize=12)
-    plt.yticks(fontsize=12)
-    plt.savefig('s_mag_from_planet_nh.png', bbox_inches='tight')
-    plt.close()
+    plots.render(SPECS['mag'], {'h': h, 'nh': nh})
 
 
 def s_size_from_planet(h, nh):
@@ -325,148 +203,230 @@ def s_size_from_planet(h, nh):
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     relative size of the parent star in the sky of the planet
     """
-    # plot with only habitable planets
-    plt.cla()
-    plt.subplots(figsize=(5, 5))
-    sns.swarmplot(x='P. Habitable Class', y='S. Size from Planet (deg)',
-                  data=h, order=planets, size=3)
-    plt.xticks(rotation=-15)
-    plt.title('Planet Habitability in Relation to Star Size from Planet')
-    plt.savefig('s_size_from_planet_h.png', bbox_inches='tight')
-    plt.close()
-
-    # plot with only non-habitable planets
-    plt.cla()
-    plt.subplots(figsize=(20, 20))
-    sns.swarmplot(x='P. Habitable Class', y='S. Size from Planet (deg)',
-                  data=nh, size=3)
-    plt.title('Planet Habitability in Relation to Star Size from Planet',
-              fontsize=30)
-    plt.xlabel('P. Habitable Class', fontsize=24)
-    plt.ylabel('S. Size from Planet (deg)', fontsize=24)
-    plt.xticks(fontsize=16)
-    plt.yticks(fontsize=16)
-    plt.savefig('s_size_from_planet_nh.png', bbox_inches='tight')
-    plt.close()
-
-
-def model(data, kepler_data):
+    plots.render(SPECS['size'], {'h': h, 'nh': nh})
+
+
+def model(confirmed, kepler, multi_output=False):
     """
     Creates models for predicting the habitability and habitable class of
     different exoplanets and Kepler objects based on characteristics of the
-    stars they revolve around. Prints accuracy scores for both models in
-    making predictions based on both confirmed exoplanets and Kepler objects.
+    stars they revolve around, and prints how accurate they are, as in
+    models.evaluate.
     """
+    import models
+    models.evaluate(confirmed, kepler, multi_output)
+
+
+# every plot made by main, along with the names of the frames it is drawn
+# from, the name it is picked by on the command line, the label printed once
+# it has finished, the columns it reads and the files it saves
+PLOTS = [(s_type, ('data',), 'type', 'type', ['S. Type', 'P. Habitable'],
+          ['s_type.png', 's_type_all.png']),
+         (s_mass, ('h', 'nh'), 'mass', 'mass',
+          ['P. Habitable Class', 'S. Mass (SU)'],
+          ['s_mass_h.png', 's_mass_nh.png']),
+         (s_radius, ('h', 'nh'), 'radius', 'radius',
+          ['P. Habitable Class', 'S. Radius (SU)'],
+          ['s_radius_h.png', 's_radius_nh.png']),
+         (s_mass_vs_radius, ('data', 'h'), 'mass_vs_radius', 'mass vs radius',
+          ['P. Habitable Class', 'S. Mass (SU)', 'S. Radius (SU)'],
+          ['s_mass_vs_radius_all.png', 's_mass_vs_radius_h.png']),
+         (s_teff, ('h', 'nh'), 'teff', 'teff',
+          ['P. Habitable Class', 'S. Teff (K)'],
+          ['s_teff_h.png', 's_teff_nh.png']),
+         (s_luminosity, ('h', 'nh'), 'luminosity', 'luminosity',
+          ['P. Habitable Class', 'S. Luminosity (SU)'],
+          ['s_luminiosity_h.png', 's_luminiosity_nh.png']),
+         (s_FeH, ('h', 'nh'), 'feh', '[Fe/H]',
+          ['P. Habitable Class', 'S. [Fe/H]'],
+          ['s_FeH_h.png', 's_FeH_nh.png']),
+         (s_age, ('h', 'nh'), 'age', 'age',
+          ['P. Habitable Class', 'S. Age (Gyrs)'],
+          ['s_age_h.png', 's_age_nh.png']),
+         (s_mag_from_planet, ('h', 'nh'), 'mag', 'mag',
+          ['P. Habitable Class', 'S. Mag from Planet'],
+          ['s_mag_from_planet_h.png', 's_mag_from_planet_nh.png']),
+         (s_size_from_planet, ('h', 'nh'), 'size', 'size',
+          ['P. Habitable Class', 'S. Size from Planet (deg)'],
+          ['s_size_from_planet_h.png', 's_size_from_planet_nh.png'])]
+
+# the frames the plots are drawn from, set once in each worker process
+_frames = dict()
+
+
+def _share_frames(frames, formats, compress_level):
+    """
+    Store the already parsed frames in this process so that the plots in
+    PLOTS can be drawn from them without reading in the csv files again, and
+    save them in the given formats at the given PNG compression level.
+    """
+    _frames.update(frames)
+    plots.configure(formats, compress_level)
 
-    filt = data.loc[:, ['S. Mass (SU)', 'S. Radius (SU)', 'S. Teff (K)',
-                        'S. Luminosity (SU)', 'S. [Fe/H]', 'S. Age (Gyrs)',
-                        'S. Mag from Planet', 'S. Size from Planet (deg)',
-                        'P. Habitable', 'P. Habitable Class']]
-    filt = filt.dropna()
-
-    # Models habitability based on characteristics of confirmed exoplanets
-
-    X = filt.loc[:, (filt.columns != 'P. Habitable Class') &
-                 (filt.columns != 'P. Habitable')]
-    y = filt['P. Habitable']
-
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=.2)
-
-    model = DecisionTreeClassifier()
-    model.fit(X_train, y_train)
-
-    print('Confirmed Exoplanet Habitability Accuracy Score:')
-    print(accuracy_score(y_test, model.predict(X_test)))
-
-    # Tests previous model on all Kepler objects
-
-    kep_filt = kepler_data[kepler_data['P. Confirmed'] == 0]
-    kep_filt = kepler_data.loc[:, ['S. Mass (SU)', 'S. Radius (SU)',
-                                   'S. Teff (K)', 'S. Luminosity (SU)',
-                                   'S. [Fe/H]', 'S. Age (Gyrs)',
-                                   'S. Mag from Planet',
-                                   'S. Size from Planet (deg)',
-                                   'P. Habitable', 'P. Habitable Class']]
-    kep_filt = kep_filt.dropna()
-    kep_filt = kep_filt[kep_filt['S. Size from Planet (deg)'] != '-']
-
-    kepler_X = kep_filt.loc[:, (kep_filt.columns != 'P. Habitable Class') &
-                            (kep_filt.columns != 'P. Habitable')]
-    kepler_y = kep_filt['P. Habitable']
-
-    print('Kepler Object Habitability Accuracy Score:')
-    print(accuracy_score(kepler_y, model.predict(kepler_X)))
-
-    # Models habitable class based on characteristics of confirmed exoplanets
-
-    y_class = filt['P. Habitable Class']
 
-    X_class_train, X_class_test, y_class_train, y_class_test = \
-        train_test_split(X, y_class, test_size=.2)
+def _render(i, flush=False):
+    """
+    Draw the i-th plot in PLOTS from the shared frames, returning its index,
+    how many seconds it took, the spans recorded while drawing it and, if
+    flush is True, the records of its files once they have been written.
+    """
+    recorded = len(instrument.events())
+    plot, names = PLOTS[i][:2]
+    with instrument.span(plot.__name__) as event:
+        plot(*[_frames[name] for name in names])
+    written = plots.flush() if flush else []
+    return i, event['dur'] / 1e6, instrument.events()[recorded:], written
 
-    model_class = DecisionTreeClassifier()
-    model_class.fit(X_class_train, y_class_train)
 
-    print('Confirmed Exoplanet Habitable Class Accuracy Score:')
-    print(accuracy_score(y_class_test, model_class.predict(X_class_test)))
+def _key(i, frames, saver):
+    """
+    Return the manifest key of the i-th plot in PLOTS, which changes whenever
+    the columns it reads from the given frames, the code drawing and saving
+    it or the compression the given writer saves PNGs with does.
+    """
+    plot, names, name, _, columns, _ = PLOTS[i]
+    return manifest.plot_key([plot, plots, swarm, density, writer],
+                             [frames[n] for n in names], columns,
+                             (SPECS[name], saver.compress_level))
 
-    # Tests previous model on all Kepler objects
 
-    kepler_y_class = kep_filt['P. Habitable Class']
+def render_plots(frames, jobs=1, force=False, dry_run=False, names=None):
+    """
+    Draw the plots in PLOTS from the given dict of frames, or only those with
+    the given names, printing how long each one took as it finishes, and
+    then the size of every file saved and how long it took to encode. Plots
+    whose files were already drawn from the same data by the same code are
+    skipped unless force is True. With dry_run the plots that would be
+    drawn are listed rather than drawn. With more than one job the plots are
+    fanned out across that many worker processes, each of which is handed
+    the frames when it starts rather than reading in the data again. The
+    files are saved by plots.output, and a plot is only marked as drawn in
+    the manifest once its files have been written.
+    """
+    saver = plots.output()
+    files = {i: [f for output in PLOTS[i][5] for f in saver.outputs(output)]
+             for i in range(len(PLOTS))
+             if names is None or PLOTS[i][2] in names}
+    built = manifest.Manifest()
+    keys = {i: _key(i, frames, saver) for i in files}
+    todo = [i for i in keys if force or built.stale(files[i], keys[i])]
+    for i in keys:
+        if i not in todo:
+            print('skipped %s, up to date' % PLOTS[i][2])
+    if dry_run:
+        for i in todo:
+            print('would draw %s:' % PLOTS[i][2], ', '.join(files[i]))
+        return
+
+    def record(ready):
+        for i in ready:
+            built.record(files[i], keys[i])
+        if ready:
+            built.save()
+
+    written = list()
+    if jobs == 1:
+        _frames.update(frames)
+        # the writes of each plot whose files may still be being written
+        writing = dict()
+
+        def written_cleanly():
+            ready = [i for i, futures in writing.items()
+                     if all(f.done() and f.exception() is None
+                            for f in futures)]
+            for i in ready:
+                del writing[i]
+            record(ready)
+
+        for i in todo:
+            submitted = len(saver.pending)
+            _, seconds, _, _ = _render(i)
+            print('finished %s!   ' % PLOTS[i][3],
+                  '--- %s seconds ---' % seconds)
+            writing[i] = saver.pending[submitted:]
+            written_cleanly()
+        # every plot whose files were all written is recorded before flush
+        # raises the error of any that weren't
+        wait([f for futures in writing.values() for f in futures])
+        written_cleanly()
+        written.extend(plots.flush())
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_share_frames,
+                                 initargs=(frames, saver.formats,
+                                           saver.compress_level)) as pool:
+            futures = [pool.submit(_render, i, True) for i in todo]
+            for future in as_completed(futures):
+                i, seconds, events, files_written = future.result()
+                instrument.merge(events)
+                written.extend(files_written)
+                print('finished %s!   ' % PLOTS[i][3],
+                      '--- %s seconds ---' % seconds)
+                record([i])
+    if written:
+        print()
+        writer.report(written)
+
+
+def plot(args, names=None):
+    """
+    Draw the plots in PLOTS, or only those with the given names, with the
+    options from exoplanets.add_plot_arguments in the given parsed
+    arguments.
+    """
+    # a multi-page PDF can only be written by one process, and only holds
+    # the plots drawn, so every one is drawn by this one
+    jobs = args.jobs
+    if args.pdf:
+        jobs, args.force = 1, True
+    plots.configure(args.format, args.compress_level, args.pdf)
+
+    # read in the columns of the confirmed exoplanet data used
+    data = catalog.load('phl_hec_all_confirmed.csv',
+                        ['S. Type', 'P. Habitable', 'P. Habitable Class'] +
+                        features)
+
+    # partition the data by class once, so the habitable (h) and
+    # non-habitable (nh) sets are views of it rather than filtered copies
+    confirmed = dataset.Dataset(data)
+
+    # plot each relationship, the non-habitable swarmplots have thousands of
+    # overlapping values, so they are laid out by swarm.swarmplot rather than
+    # seaborn, which is slow with that many points.
+    with instrument.span('plots'):
+        render_plots({'data': confirmed.data, 'h': confirmed.h,
+                      'nh': confirmed.nh}, jobs, args.force,
+                     args.dry_run, names)
+    plots.close()
+
+
+def run(args):
+    """
+    Draw every plot and then make and score the models, with the options
+    of the stats command in the given parsed arguments.
+    """
+    plot(args)
+    if args.dry_run:
+        return
+    print()
 
-    print('Kepler Object Habitable Class Accuracy Score:')
-    print(accuracy_score(kepler_y_class, model_class.predict(kepler_X)))
+    with instrument.span('model'):
+        model(matrix.load('phl_hec_all_confirmed.csv'),
+              matrix.load('phl_hec_all_kepler.csv', confirmed=0),
+              args.multi_output)
 
 
 def main():
-    # read in the confirmed exoplanet data
-    data = pd.read_csv('phl_hec_all_confirmed.csv')
-    kepler_data = pd.read_csv('phl_hec_all_kepler.csv')
-
-    # filter data into habitable (h) and non-habitable (nh) sets
-    nh = data[data['P. Habitable Class'] == 'non-habitable']
-    h = data[data['P. Habitable Class'] != 'non-habitable']
-
-    # start a timer for the sake of seeing how long each plot takes
-    # some take a long time, this is due to overlapping values in the swarmplot
-    # to stop this from happening we need to make the axis larger, but kind of
-    # unreasonably wider, so we crop it for the sake of legibility.
-    start_time = time.time()
-
-    # plot each relationship
-
-    s_type(data)
-    print('finished type!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_mass(h, nh)
-    print('finished mass!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_radius(h, nh)
-    print('finished radius!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_mass_vs_radius(data, h)
-    print('finished mass vs radius!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_teff(h, nh)
-    print('finished teff!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_luminosity(h, nh)
-    print('finished luminosity!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_FeH(h, nh)
-    print('finished [Fe/H]!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_age(h, nh)
-    print('finished age!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_mag_from_planet(h, nh)
-    print('finished mag!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
-    s_size_from_planet(h, nh)
-    print('finished size!   ',
-          '--- %s seconds ---\n' % (time.time() - start_time))
-
-    model(data, kepler_data)
+    parser = argparse.ArgumentParser(description='Plot and model the '
+                                     'habitability of confirmed exoplanets')
+    exoplanets.add_plot_arguments(parser)
+    parser.add_argument('--multi-output', action='store_true',
+                        help='predict habitability and habitable class with '
+                        'a single tree rather than one tree each')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+    run(args)
+    instrument.finish(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,158 @@
+# A faster stand-in for seaborn's swarmplot. Seaborn places every point one
+# at a time, checking it against all of the points already placed, which gets
+# very slow for the thousands of non-habitable planets. Here the points of
+# each category are binned along the value axis and the points sharing a bin
+# are stacked side by side with a handful of vectorized NumPy operations.
+# Categories whose swarm would spread past the room given to them, so that
+# points would have to overlap, are drawn as a violin with the points
+# stripped over it instead.
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import matplotlib.pyplot as plt
+
+import instrument
+
+# fraction of the space between two categories that a swarm may spread over
+WIDTH = .8
+
+# the most values a violin is estimated from, and the most points stripped
+# over it, so a violin takes the same time however big its category is
+VIOLIN_SAMPLE = 2000
+STRIP_POINTS = 5000
+
+
+def swarm_offsets(values, diameter):
+    """
+    Lay out the given values as a swarm of points with the given diameter,
+    both in pixels. Returns the offset of each point from the center of the
+    swarm along with the position it is drawn at along the value axis, both
+    in pixels. Values are binned into rows one point high with every other
+    row staggered by half a point, so points are packed hexagonally and never
+    overlap. Each point is moved to the middle of its row, which is never
+    more than half a point away from its value.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return np.empty(0), np.empty(0)
+    row_height = diameter * np.sqrt(3) / 2
+    rows = np.floor((values - values.min()) / row_height).astype(np.int64)
+
+    # rank every point within its row, smallest value first
+    order = np.lexsort((values, rows))
+    sorted_rows = rows[order]
+    starts = np.r_[True, sorted_rows[1:] != sorted_rows[:-1]]
+    first = np.maximum.accumulate(np.where(starts, np.arange(len(rows)), 0))
+    rank = np.empty(len(rows), dtype=np.int64)
+    rank[order] = np.arange(len(rows)) - first
+
+    # alternate points to the right and left of the center, with odd rows
+    # shifted over by half a point
+    side = np.where(rank % 2 == 0, 1, -1)
+    staggered = rows % 2 == 1
+    slot = np.where(staggered, rank // 2 + .5, (rank + 1) // 2) * side
+    centers = values.min() + (rows + .5) * row_height
+    return slot * diameter, centers
+
+
+def _value_limits(ax, values):
+    """
+    Return the limits of the value axis needed to fit the given values,
+    including anything that has already been drawn on the axes.
+    """
+    low, high = np.nanmin(values), np.nanmax(values)
+    pad = (high - low) * .05 or .5
+    low, high = low - pad, high + pad
+    if ax.has_data():
+        current = ax.get_ylim()
+        low, high = min(low, current[0]), max(high, current[1])
+    return low, high
+
+
+def swarmplot(x, y, data, order=None, size=5, ax=None):
+    """
+    Draw a categorical swarmplot of the y column of data against the x column
+    onto ax, or the current axes if none is given. Takes the same arguments
+    as seaborn's swarmplot, where size is the diameter of a point. A
+    category whose swarm doesn't fit in WIDTH of the space between two
+    categories is drawn as a violin instead. Returns the axes drawn onto.
+    """
+    if ax is None:
+        ax = plt.gca()
+    d = data[[x, y]].dropna()
+    if order is None:
+        order = list(pd.unique(d[x]))
+    colors = sns.color_palette(n_colors=len(order))
+    if len(d) == 0:
+        return ax
+
+    # work out how big a pixel is in data units so points don't overlap
+    low, high = _value_limits(ax, d[y].to_numpy())
+    ax.set_ylim(low, high)
+    ax.set_xlim(-.5, len(order) - .5)
+    box = ax.get_window_extent()
+    value_scale = box.height / (high - low)
+    category_scale = box.width / len(order)
+    diameter = size * ax.figure.dpi / 72
+    # a swarm can't hold more than a row of points across its room for every
+    # row up the value axis, so bigger categories aren't even laid out
+    room = WIDTH * category_scale
+    budget = max(1, int(room // diameter)) * \
+        (int(box.height / (diameter * np.sqrt(3) / 2)) + 1)
+    groups = d.groupby(x, sort=False, observed=True)[y]
+
+    for i, category in enumerate(order):
+        if category not in groups.groups:
+            continue
+        values = groups.get_group(category).to_numpy(dtype=float)
+        if len(values) > budget:
+            _density(ax, i, values, size, colors[i])
+            continue
+        with instrument.span('layout', points=len(values)):
+            offsets, centers = swarm_offsets((values - low) * value_scale,
+                                             diameter)
+        # values bunched into a few rows can still spread wider than the room
+        if np.abs(offsets).max() + diameter / 2 > room / 2:
+            _density(ax, i, values, size, colors[i])
+            continue
+        ax.scatter(i + offsets / category_scale, low + centers / value_scale,
+                   s=size ** 2, color=colors[i], linewidth=0)
+
+    ax.set_xticks(range(len(order)))
+    ax.set_xticklabels(order)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.grid(False, axis='x')
+    return ax
+
+
+def _density(ax, position, values, size, color):
+    """
+    Draw the given values at the given category position as a violin with
+    the points stripped over it, for categories too big to swarm. The
+    violin is estimated from at most VIOLIN_SAMPLE of the values and at most
+    STRIP_POINTS of them are stripped over it, always including the
+    smallest and largest.
+    """
+    rng = np.random.default_rng(0)
+    sample = _sample(values, VIOLIN_SAMPLE, rng)
+    parts = ax.violinplot([sample], positions=[position], widths=WIDTH,
+                          showextrema=False)
+    for body in parts['bodies']:
+        body.set_facecolor(color)
+        body.set_alpha(.3)
+    strip = _sample(values, STRIP_POINTS - 2, rng)
+    strip = np.r_[strip, values.min(), values.max()]
+    jitter = rng.uniform(-WIDTH / 4, WIDTH / 4, len(strip))
+    ax.scatter(position + jitter, strip, s=(size / 2) ** 2, color=color,
+               alpha=.5, linewidth=0)
+
+
+def _sample(values, most, rng):
+    """
+    Return the given values if there are no more than most of them, or else
+    most of them picked at random.
+    """
+    if len(values) <= most:
+        return values
+    return values[rng.choice(len(values), most, replace=False)]
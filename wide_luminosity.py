@@ -1,43 +1,53 @@
 # we can put the code for our stats functions in here
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import time
-sns.set()
+import argparse
+
+import catalog
+import dataset
+import instrument
+import plots
+import writer
 
 planets = ['hypopsychroplanet', 'psychroplanet', 'mesoplanet',
            'thermoplanet']
 
 
+# the non-habitable planets, drawn very wide and with tiny points so that the
+# whole distribution can be seen
+SPEC = plots.Spec('wide_s_luminiosity_nh.png', 'swarm', ('nh',),
+                  'P. Habitable Class', 'S. Luminosity (SU)',
+                  'Distribution of Number of Non-Habitable'
+                  ' Planets per Class vs Parent Star Luminosity',
+                  figsize=(75, 20), size=1)
+
+
 def s_luminosity(h, nh):
     """
     Plot the distribution of confirmed exoplanets by exoplanet class vs the
     luminosity of their parent star.
     """
-    # plot with only non-habitable planets
-    plt.cla()
-    plt.subplots(figsize=(75, 20))
-    sns.swarmplot(x='P. Habitable Class', y='S. Luminosity (SU)',
-                  size=1, data=nh)
-    plt.title('Distribution of Number of Non-Habitable' +
-              ' Planets per Class vs Parent Star Luminosity')
-    plt.savefig('wide_s_luminiosity_nh.png', bbox_inches='tight')
-    plt.close()
+    plots.render([SPEC], {'h': h, 'nh': nh})
 
 
 def main():
-    # read in the confirmed exoplanet data
-    data = pd.read_csv('phl_hec_all_confirmed.csv')
+    parser = argparse.ArgumentParser(description='Plot the full distribution'
+                                     ' of non-habitable planets by luminosity')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
 
-    # filter data into habitable (h) and non-habitable (nh) sets
-    nh = data[data['P. Habitable Class'] == 'non-habitable']
-    h = data[data['P. Habitable Class'] != 'non-habitable']
-
-    start_time = time.time()
-
-    s_luminosity(h, nh)
-    print('finished luminosity!   ',
-          '--- %s seconds ---' % (time.time() - start_time))
+    # read in the confirmed exoplanet data
+    data = catalog.load('phl_hec_all_confirmed.csv',
+                        ['P. Habitable Class', 'S. Luminosity (SU)'])
+
+    # split data into habitable (h) and non-habitable (nh) sets
+    ds = dataset.Dataset(data)
+    nh = ds.nh
+    h = ds.h
+
+    with instrument.span('s_luminosity'):
+        s_luminosity(h, nh)
+    writer.report(plots.close())
+    instrument.finish(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,170 @@
+# Saves drawn figures without holding up the next plot. A figure is rendered
+# to pixels, or to SVG or PDF, as soon as it is drawn, since the figure is
+# reused for the next plot of the same size, but compressing the pixels into
+# a PNG and writing every file to disk is handed off to a pool of background
+# threads, so it happens while the next plot is being laid out. Every
+# figure can be saved in more than one format and added as a page to a
+# single PDF of the whole set, and how long each file took to render and
+# encode and how big it is are kept so they can be reported once the writes
+# have finished.
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import matplotlib as mpl
+from matplotlib.backends.backend_pdf import PdfPages
+from PIL import Image
+
+# the formats figures can be saved in
+FORMATS = ['png', 'svg', 'pdf']
+
+# the zlib level PNGs are compressed with, from 0 for none to 9 for the
+# smallest files, 6 is what matplotlib uses
+COMPRESS_LEVEL = 6
+
+# background threads encoding and writing files
+THREADS = 2
+
+
+def path(output, fmt):
+    """
+    Return the given output file with its extension swapped for the given
+    format's.
+    """
+    return os.path.splitext(output)[0] + '.' + fmt
+
+
+class Writer:
+    """
+    Saves figures in the given formats, compressing PNGs at the given level,
+    and adds each one as a page to the PDF at the given path if there is
+    one. Files are encoded and written by the given number of background
+    threads.
+    """
+
+    def __init__(self, formats=('png',), compress_level=COMPRESS_LEVEL,
+                 pdf=None, threads=THREADS):
+        self.formats = tuple(formats)
+        self.compress_level = compress_level
+        self.pool = ThreadPoolExecutor(threads)
+        self.pages = PdfPages(pdf) if pdf else None
+        self.pending = list()
+        self.records = list()
+        self.lock = threading.Lock()
+
+    def outputs(self, output):
+        """
+        Return the files a figure saved to the given output is written to.
+        """
+        return [path(output, fmt) for fmt in self.formats]
+
+    def save(self, fig, output, tight=True):
+        """
+        Save the given figure to the given output in each format, cropped to
+        what is drawn on it if tight is True, as savefig's bbox_inches does.
+        The figure can be drawn on again as soon as this returns.
+        """
+        bbox = None
+        if tight:
+            bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(
+                mpl.rcParams['savefig.pad_inches'])
+        for fmt in self.formats:
+            start = time.perf_counter()
+            buffer = io.BytesIO()
+            if fmt == 'png':
+                # only the pixels are rendered here, compressing them is
+                # left to encode
+                fig.savefig(buffer, format='rgba', bbox_inches=bbox)
+                # the size of what was rendered, which rounding the bbox
+                # to pixels doesn't always give
+                renderer = fig.canvas.renderer
+                size = (int(renderer.width), int(renderer.height))
+                if len(buffer.getbuffer()) != size[0] * size[1] * 4:
+                    raise ValueError('rendered %s at an unexpected size' %
+                                     output)
+                job = (self.encode, buffer, size, fig.dpi)
+            else:
+                fig.savefig(buffer, format=fmt, bbox_inches=bbox)
+                job = (buffer.getvalue,)
+            rendered = time.perf_counter() - start
+            self.pending.append(self.pool.submit(
+                self.write, path(output, fmt), fmt, rendered, *job))
+        if self.pages is not None:
+            self.pages.savefig(fig, bbox_inches=bbox)
+
+    def encode(self, buffer, size, dpi):
+        """
+        Return the given RGBA pixels of the given width and height as a PNG.
+        """
+        image = Image.frombuffer('RGBA', size, buffer.getbuffer(), 'raw',
+                                 'RGBA', 0, 1)
+        encoded = io.BytesIO()
+        image.save(encoded, format='png', compress_level=self.compress_level,
+                   dpi=(dpi, dpi))
+        return encoded.getvalue()
+
+    def write(self, target, fmt, rendered, encode, *args):
+        """
+        Encode a rendered figure with the given function and arguments and
+        write it to the given file, recording how long each step took and
+        how many bytes were written.
+        """
+        start = time.perf_counter()
+        data = encode(*args)
+        encoded = time.perf_counter() - start
+        # write to a temporary file first so a half written figure is never
+        # left behind under the real name
+        building = target + '.part'
+        with open(building, 'wb') as f:
+            f.write(data)
+        os.replace(building, target)
+        with self.lock:
+            self.records.append({'output': target, 'format': fmt,
+                                 'bytes': len(data), 'render': rendered,
+                                 'encode': encoded,
+                                 'write': time.perf_counter() - start -
+                                 encoded})
+
+    def flush(self):
+        """
+        Wait for every file to be written, raising the first error any of
+        them hit, and return the records of the files written since the last
+        flush, each a dict of its output, format, bytes and the seconds
+        spent rendering, encoding and writing it.
+        """
+        done, _ = wait(self.pending)
+        self.pending = list()
+        for future in done:
+            future.result()
+        with self.lock:
+            records, self.records = self.records, list()
+        return records
+
+    def close(self):
+        """
+        Flush every file, finish the PDF of every page and stop the
+        background threads, returning the records from flush.
+        """
+        records = self.flush()
+        if self.pages is not None:
+            self.pages.close()
+        self.pool.shutdown()
+        return records
+
+
+def report(records):
+    """
+    Print the size of each file in the given records from Writer.flush and
+    how long it took to render and encode, along with the totals.
+    """
+    for r in sorted(records, key=lambda r: r['output']):
+        print('%-36s %10d bytes  render %7.3fs  encode %7.3fs  write '
+              '%7.3fs' % (r['output'], r['bytes'], r['render'], r['encode'],
+                          r['write']))
+    if records:
+        print('%-36s %10d bytes  render %7.3fs  encode %7.3fs  write '
+              '%7.3fs' % ('total', sum(r['bytes'] for r in records),
+                          *[sum(r[step] for r in records)
+                            for step in ('render', 'encode', 'write')]))